@@ -1,12 +1,19 @@
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import bcrypt
+from bson import ObjectId
+from bson.errors import InvalidId
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 from typing import Optional
 from dotenv import load_dotenv
 
+from mongodb import users_collection
+from services.hashing_pool import hashing_pool
+
 load_dotenv()
 
 SECRET_KEY = os.getenv("JWT_SECRET", "supersecret")
@@ -15,12 +22,69 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7 # 7 days keep logged in
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# How long a looked-up user stays valid in a worker without an explicit invalidation.
+# Bounds how long a change made through another worker can go unnoticed.
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+PRINCIPAL_CACHE_MAX_ENTRIES = 10000
+TOKEN_CACHE_MAX_ENTRIES = 10000
+
+class TTLCache:
+    """Small LRU dict whose entries also expire after a fixed number of seconds."""
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key, value, ttl_seconds=None):
+        self._entries[key] = (time.monotonic() + (ttl_seconds or self.ttl_seconds), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+# user id -> principal dict returned by get_current_user
+principal_cache = TTLCache(PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES)
+# raw token -> decoded claims; entries never outlive the token's own exp
+token_cache = TTLCache(ACCESS_TOKEN_EXPIRE_MINUTES * 60, TOKEN_CACHE_MAX_ENTRIES)
+
+def invalidate_user(user_id):
+    """
+    Drops a user's cached principal in this worker; login calls it so a fresh sign-in sees
+    the current account. No route edits users yet: a change made elsewhere (a script, the
+    database shell, another worker) shows up after at most PRINCIPAL_CACHE_TTL_SECONDS.
+    """
+    principal_cache.pop(str(user_id))
+
 def verify_password(plain_password, hashed_password):
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 def get_password_hash(password):
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
+async def verify_password_async(plain_password, hashed_password):
+    """verify_password on the bounded hashing pool. Raises PoolSaturated when it is full."""
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    """get_password_hash on the bounded hashing pool. Raises PoolSaturated when it is full."""
+    return await hashing_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -31,6 +95,37 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str):
+    """Decodes and verifies a JWT, memoized per token until it expires. Raises JWTError."""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    ttl = payload["exp"] - time.time() if isinstance(payload.get("exp"), (int, float)) else None
+    if ttl is None or ttl > 0:
+        token_cache.set(token, payload, ttl)
+    return payload
+
+async def load_principal(user_id: str):
+    """Returns {"id", "email", "username"} for a user id, or None if the user doesn't exist."""
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    try:
+        user = await users_collection.find_one({"_id": ObjectId(user_id)}, {"email": 1, "username": 1})
+    except InvalidId:
+        return None
+    if user is None:
+        # Deleted users are never cached, so their tokens stop working immediately
+        return None
+    principal = {
+        "id": str(user["_id"]),
+        "email": user["email"],
+        "username": user["username"]
+    }
+    principal_cache.set(user_id, principal)
+    return principal
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Dependency to retrieve the current user from the JWT token and attach it to API requests."""
     credentials_exception = HTTPException(
@@ -39,22 +134,15 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-            
-        from mongodb import users_collection
-        from bson import ObjectId
-        
-        user = await users_collection.find_one({"_id": ObjectId(user_id)})
-        if user is None:
-            raise credentials_exception
-            
-        return {
-            "id": str(user["_id"]),
-            "email": user["email"],
-            "username": user["username"]
-        }
+        payload = decode_access_token(token)
     except JWTError:
         raise credentials_exception
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise credentials_exception
+
+    principal = await load_principal(user_id)
+    if principal is None:
+        raise credentials_exception
+    # Copy so handlers can't mutate the cached principal
+    return dict(principal)
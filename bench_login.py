@@ -0,0 +1,88 @@
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def summarize(label, latencies):
+    if not latencies:
+        print(f"{label}: no requests")
+        return
+    print(f"{label}: n={len(latencies)} p50={percentile(latencies, 50):.1f} ms "
+          f"p95={percentile(latencies, 95):.1f} ms p99={percentile(latencies, 99):.1f} ms "
+          f"max={max(latencies):.1f} ms mean={statistics.mean(latencies):.1f} ms")
+
+def register_user(base_url):
+    """Creates a throwaway account and returns (email, password, token)."""
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    password = uuid.uuid4().hex
+    r = requests.post(f"{base_url}/api/auth/register", json={"username": email.split("@")[0], "email": email, "password": password})
+    r.raise_for_status()
+    return email, password, r.json()["access_token"]
+
+def probe(base_url, token, stop, latencies, interval):
+    """Measures a cheap authenticated endpoint while the login storm runs."""
+    session = requests.Session()
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.get(f"{base_url}/api/articles/suggest", params={"q": "a"}, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+
+def run_benchmark(base_url, logins, concurrency, probe_seconds):
+    email, password, token = register_user(base_url)
+
+    # Baseline latency of the probed endpoint without a storm
+    baseline = []
+    stop = threading.Event()
+    thread = threading.Thread(target=probe, args=(base_url, token, stop, baseline, 0.01))
+    thread.start()
+    time.sleep(probe_seconds)
+    stop.set()
+    thread.join()
+    summarize("Other endpoint, idle", baseline)
+
+    during = []
+    statuses = {}
+    login_latencies = []
+    stop = threading.Event()
+    thread = threading.Thread(target=probe, args=(base_url, token, stop, during, 0.01))
+    thread.start()
+
+    def login(_):
+        start = time.perf_counter()
+        r = requests.post(f"{base_url}/api/auth/login", json={"email": email, "password": password})
+        login_latencies.append((time.perf_counter() - start) * 1000)
+        return r.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for code in pool.map(login, range(logins)):
+            statuses[code] = statuses.get(code, 0) + 1
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+
+    print(f"Login storm: {logins} logins, concurrency {concurrency}, {elapsed:.1f} s, "
+          f"{statuses.get(200, 0) / elapsed:.1f} successful logins/s, status codes {statuses}")
+    summarize("Login", login_latencies)
+    summarize("Other endpoint, during storm", during)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login storm against a running API, measuring other endpoints' latency meanwhile")
+    parser.add_argument("--url", default="http://localhost:8080", help="Base URL of a running backend")
+    parser.add_argument("--logins", type=int, default=200, help="Number of login requests to send")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent login requests")
+    parser.add_argument("--probe-seconds", type=float, default=3.0, help="Duration of the idle baseline measurement")
+    args = parser.parse_args()
+    run_benchmark(args.url.rstrip("/"), args.logins, args.concurrency, args.probe_seconds)
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import time
+
+from pymongo import UpdateOne
+
+from mongodb import articles_collection
+from services.article_store import attach_bodies
+from services.nlp_engine import calculate_readability_score, calculate_readability_scores, count_syllables
+
+SAMPLE_TEXT = (
+    "The city council approved a new budget on Tuesday. Officials said the plan adds 4,500 jobs. "
+    "Critics argued that the spending was too high; supporters disagreed. "
+    "The mayor will present the final numbers to residents next week."
+)
+
+async def load_corpus():
+    """Loads the simplified text of every processed article (projection only)."""
+    cursor = articles_collection.find({"processing_status": "PASS"}, {"has_body": 1, "simplified_text": 1})
+    docs = await attach_bodies(await cursor.to_list(length=None))
+    return [d["_id"] for d in docs], [d.get("simplified_text", "") for d in docs]
+
+async def run_benchmark(synthetic, backfill):
+    if synthetic:
+        ids, texts = [], [SAMPLE_TEXT * (1 + i % 10) for i in range(synthetic)]
+    else:
+        ids, texts = await load_corpus()
+
+    if not texts:
+        print("No articles to score.")
+        return
+
+    total_words = sum(len(t.split()) for t in texts)
+    print(f"Corpus: {len(texts)} texts, {total_words} words")
+
+    count_syllables.cache_clear()
+    start = time.perf_counter()
+    scalar_scores = [calculate_readability_score(t) for t in texts]
+    scalar_elapsed = time.perf_counter() - start
+    print(f"Per-article scoring: {scalar_elapsed * 1000:.1f} ms ({len(texts) / scalar_elapsed:.0f} articles/s)")
+
+    count_syllables.cache_clear()
+    start = time.perf_counter()
+    batch_scores = calculate_readability_scores(texts)
+    batch_elapsed = time.perf_counter() - start
+    print(f"Batch scoring (cold cache): {batch_elapsed * 1000:.1f} ms ({len(texts) / batch_elapsed:.0f} articles/s)")
+
+    start = time.perf_counter()
+    calculate_readability_scores(texts)
+    warm_elapsed = time.perf_counter() - start
+    print(f"Batch scoring (warm cache): {warm_elapsed * 1000:.1f} ms ({len(texts) / warm_elapsed:.0f} articles/s)")
+    print(f"Syllable cache: {count_syllables.cache_info()}")
+    print(f"Max scalar/batch difference: {max(abs(a - b) for a, b in zip(scalar_scores, batch_scores)):.6f}")
+
+    if backfill and ids:
+        ops = [UpdateOne({"_id": _id}, {"$set": {"readability_score": round(float(score), 2)}}) for _id, score in zip(ids, batch_scores)]
+        start = time.perf_counter()
+        for i in range(0, len(ops), 1000):
+            await articles_collection.bulk_write(ops[i:i + 1000], ordered=False)
+        print(f"Backfilled {len(ops)} readability scores in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Flesch-Kincaid scoring over the article corpus")
+    parser.add_argument("--synthetic", type=int, default=0, help="Score N generated texts instead of reading MongoDB")
+    parser.add_argument("--backfill", action="store_true", help="Write the re-computed scores back to the articles collection")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.synthetic, args.backfill))
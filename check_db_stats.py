@@ -1,25 +1,38 @@
 import asyncio
 from mongodb import articles_collection
+from services.article_store import attach_bodies
+from services.engagement import engagement_report
 
 async def check_stats():
-    total = await articles_collection.count_documents({})
-    passed = await articles_collection.count_documents({"processing_status": "PASS"})
-    failed = await articles_collection.count_documents({"processing_status": "FAIL"})
+    # One grouped pass instead of a count_documents per status plus distinct()
+    by_status = {g["_id"]: g["count"] async for g in articles_collection.aggregate([
+        {"$group": {"_id": "$processing_status", "count": {"$sum": 1}}}
+    ])}
+    total = sum(by_status.values())
+    passed = by_status.get("PASS", 0)
+    failed = by_status.get("FAIL", 0)
     
     print(f"Total Documents: {total}")
     print(f"Passed: {passed}")
     print(f"Failed: {failed}")
     
     # Check distinct statuses
-    statuses = await articles_collection.distinct("processing_status")
-    print(f"Distinct Statuses: {statuses}")
+    print(f"Distinct Statuses: {list(by_status)}")
     
     # List a few failed reasons if any
     if failed > 0:
         print("\nRecent Failures:")
-        cursor = articles_collection.find({"processing_status": "FAIL"}).sort("created_at", -1).limit(5)
-        async for doc in cursor:
+        cursor = articles_collection.find({"processing_status": "FAIL"}, {"simplified_headline": 1, "simplified_text": 1, "has_body": 1}).sort("_id", -1).limit(5)
+        for doc in await attach_bodies(await cursor.to_list(length=5)):
             print(f"- {doc.get('simplified_headline', 'No Headline')} | Reason: {doc.get('simplified_text', 'No Text')[:50]}...")
 
+    # Engagement from the pre-aggregated buckets (no scan of raw metric events)
+    print("\nViews per genre, last 7 days:")
+    for row in await engagement_report("genre", days=7):
+        print(f"- {row['key']}: {row['views']} views, {row['quizzes']} quizzes, avg score {row['avg_quiz_score']}")
+    print("\nLanguages, all time:")
+    for row in await engagement_report("lang", days=None):
+        print(f"- {row['key']}: {row['views']} views, {row['quizzes']} quizzes")
+
 if __name__ == "__main__":
     asyncio.run(check_stats())
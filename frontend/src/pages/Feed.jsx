@@ -12,6 +12,8 @@ export default function Feed() {
     const [selectedGenre, setSelectedGenre] = useState('All')
     const [currentPage, setCurrentPage] = useState(1)
     const [totalPages, setTotalPages] = useState(1)
+    // next_cursor tokens by filters and page, so Next/Previous use keyset pagination
+    const [pageCursors, setPageCursors] = useState({})
     const [serverOffline, setServerOffline] = useState(false)
     const [uniqueGenres, setUniqueGenres] = useState(['All'])
     const { user } = useAuth()
@@ -37,6 +39,9 @@ export default function Feed() {
 
         if (searchQuery) queryParams.append('search', searchQuery)
         if (selectedGenre !== 'All') queryParams.append('genre', selectedGenre)
+        const filtersKey = `${language}|${searchQuery}|${selectedGenre}`
+        const cursor = pageCursors[`${filtersKey}|${currentPage}`]
+        if (cursor) queryParams.append('cursor', cursor)
 
         fetch(`${baseUrl}/api/articles?${queryParams.toString()}`, {
             headers: { 'Authorization': `Bearer ${token}` }
@@ -47,6 +52,10 @@ export default function Feed() {
                 const articlesData = data.articles || []
                 setArticles(articlesData)
                 setTotalPages(data.pagination ? data.pagination.total_pages : 1)
+                if (data.pagination && data.pagination.next_cursor) {
+                    const nextCursor = data.pagination.next_cursor
+                    setPageCursors(prev => ({ ...prev, [`${filtersKey}|${currentPage + 1}`]: nextCursor }))
+                }
                 setLoading(false)
 
                 if (articlesData.length === 0 && currentPage === 1) {
@@ -18,6 +18,16 @@ scheduler = AsyncIOScheduler()
 
 
 from routes_auth import router as auth_router
+from mongodb import articles_collection
+from services.search_index import search_index, SYNC_INTERVAL_SECONDS, SUPPORTED_LANGUAGES
+from services.suggest_index import suggest_index
+from services.metrics_buffer import metrics_buffer
+from services.user_rollups import apply_events, load_user_stats
+from services.engagement import apply_events as apply_engagement_events, engagement_report, DIMENSIONS
+from services.quiz_analytics import apply_events as apply_quiz_events, question_report, MIN_REPORT_ATTEMPTS
+from services.compression import CompressionMiddleware
+from services.indexes import ensure_indexes
+import datetime
 
 import asyncio
 
@@ -28,15 +38,55 @@ async def scheduled_ingestion():
     except Exception as e:
         print(f"Error during scheduled auto-ingestion: {e}")
 
+async def refresh_article_indexes():
+    """Tails articles ingested by any worker into this worker's search and suggestion indexes."""
+    try:
+        await search_index.refresh(articles_collection, force=True)
+    except Exception as e:
+        print(f"Error refreshing article indexes: {e}")
+
 @app.on_event("startup")
 def startup_event():
     scheduler.add_job(scheduled_ingestion, "interval", minutes=5, max_instances=2)
+    scheduler.add_job(refresh_article_indexes, "interval", seconds=SYNC_INTERVAL_SECONDS,
+                      next_run_time=datetime.datetime.now(), max_instances=1)
+    scheduler.add_job(warm_detail_cache)
     scheduler.start()
 
+# Per-user dashboard rollups are folded in from every written batch of metric events
+metrics_buffer.add_sink(apply_events)
+metrics_buffer.add_sink(apply_engagement_events)
+metrics_buffer.add_sink(apply_quiz_events)
+
+@app.on_event("startup")
+async def ensure_mongo_indexes():
+    # Idempotent: only indexes missing from the registry in services/indexes.py are built
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        print(f"Error ensuring MongoDB indexes: {e}")
+
+@app.on_event("startup")
+async def backfill_genre_catalog():
+    # Existing databases have articles but no catalog until it is built once
+    try:
+        await ensure_catalog()
+    except Exception as e:
+        print(f"Error building genre catalog: {e}")
+
+@app.on_event("startup")
+async def start_metrics_buffer():
+    metrics_buffer.start()
+
 @app.on_event("shutdown")
 def shutdown_event():
     scheduler.shutdown()
 
+@app.on_event("shutdown")
+async def drain_metrics_buffer():
+    # Write out every view/quiz event still buffered before the worker exits
+    await metrics_buffer.stop()
+
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
@@ -53,6 +103,9 @@ frontend_url = os.getenv("FRONTEND_URL")
 if frontend_url:
     origins.append(frontend_url)
 
+# Compress JSON responses above 1 KB (brotli when installed, otherwise gzip)
+app.add_middleware(CompressionMiddleware)
+
 # Add CORS middleware to allow React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -67,38 +120,118 @@ app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
 
 from mongodb import articles_collection, item_helper
 from auth import get_current_user
+from services.pagination import MAX_PAGE_OFFSET, query_fingerprint, encode_cursor, decode_cursor
+from services.article_store import load_article, attach_bodies, list_projection
+from services.response_cache import response_cache
+from services.genre_catalog import ensure_catalog, list_genres, published_total
+from services.detail_cache import detail_cache, DETAIL_CACHE_WARM_ARTICLES
+from services.hashing_pool import hashing_pool
+from services.bounded_executor import PoolSaturated
+from services.http_cache import EncodedPayload, encode_payload, generation_etag, etag_matches, not_modified, json_response, bytes_response
+from services.answer_keys import answer_key_cache, score_answers, question_results
+from services.tts import get_audio, audio_key, audio_etag, audio_cache, article_audio_key, stream_audio, synthesis_pool, pregeneration_stats, BudgetExceeded
+from bson import ObjectId
 
 @app.get("/api/articles")
 async def get_articles(
+    request: Request,
     lang: str = "en", 
     page: int = 1, 
     limit: int = 12, 
     search: str = "",
     genre: str = "All",
+    cursor: str = "",
     current_user: dict = Depends(get_current_user)
 ):
-    """API: Return feed of simplified articles with pagination and filtering"""
+    """
+    API: Return feed of simplified articles with pagination and filtering.
+    Pass the returned `next_cursor` as `cursor` for keyset pagination: every page then costs
+    the same as the first, and ordering stays stable while new articles are ingested. Plain
+    `page` numbers are served up to MAX_PAGE_OFFSET articles deep.
+    Pages are served from the shared response cache until the next ingestion.
+    """
+    lang = lang.lower()
+    limit = max(1, min(limit, 500))
+    key_parts = [lang, genre, search, page, cursor, limit]
+    return await cached_json_response(
+        request, "articles", key_parts,
+        lambda: build_article_page(lang, page, limit, search, genre, cursor),
+    )
+
+async def cached_json_response(request, namespace, key_parts, compute):
+    """
+    Serves a generation-versioned response from the shared response cache, answering
+    304 Not Modified from the ETag alone when the client already has this generation.
+    """
+    generation = response_cache.version()
+    etag = generation_etag(generation, namespace, key_parts) if generation is not None else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    payload = await response_cache.get_or_compute(namespace, key_parts, compute,
+                                                  cacheable=lambda response: "error" not in response)
+    if "error" in payload or not etag:
+        return payload
+    return json_response(encode_payload(payload, etag))
+
+async def build_article_page(lang, page, limit, search, genre, cursor):
     # Base query for passed articles
     query = {"processing_status": "PASS"}
-    
-    if search:
-        # Case-insensitive regex match on the headline
-        query["simplified_headline"] = {"$regex": search, "$options": "i"}
         
     if genre and genre != "All":
         query["genre"] = genre
     
-    # Calculate total matching documents
-    total_articles = await articles_collection.count_documents(query)
-    total_pages = max(1, (total_articles + limit - 1) // limit)
+    fingerprint = query_fingerprint(search, genre, lang)
+    # Only the fields a feed card renders; bodies live in article_bodies
+    projection = list_projection(lang)
     
-    # Enforce safe bounds
-    safe_page = max(1, min(page, total_pages))
-    skip = (safe_page - 1) * limit
-    
-    # Fetch paginated articles
-    cursor = articles_collection.find(query).sort("_id", -1).skip(skip).limit(limit)
-    articles = await cursor.to_list(length=limit)
+    if search:
+        # Ranked full-text search (BM25) over headline and simplified text in the requested language.
+        # A cache miss usually follows an ingestion, so pick up the new articles before ranking.
+        await search_index.refresh(articles_collection, force=True)
+        ranked_ids = search_index.search(search, lang, genre)
+        total_articles = len(ranked_ids)
+        total_pages = max(1, (total_articles + limit - 1) // limit)
+        
+        if cursor:
+            try:
+                start = ranked_ids.index(str(decode_cursor(cursor, fingerprint))) + 1
+            except ValueError:
+                return {"error": "Invalid pagination cursor"}
+            safe_page = None
+        else:
+            safe_page = max(1, min(page, total_pages))
+            start = (safe_page - 1) * limit
+        
+        page_ids = ranked_ids[start:start + limit]
+        next_cursor = encode_cursor(page_ids[-1], fingerprint) if start + limit < total_articles else None
+        found = await articles_collection.find({"_id": {"$in": [ObjectId(i) for i in page_ids]}}, projection).to_list(length=limit)
+        by_id = {str(a["_id"]): a for a in found}
+        articles = [by_id[i] for i in page_ids if i in by_id]
+    else:
+        # Totals come from the genre catalog, kept up to date on insert, instead of a count
+        total_articles = await published_total(genre if genre and genre != "All" else None)
+        total_pages = max(1, (total_articles + limit - 1) // limit)
+        
+        if cursor:
+            # Keyset pagination: continue strictly below the last _id of the previous page
+            try:
+                before_id = decode_cursor(cursor, fingerprint)
+            except ValueError:
+                return {"error": "Invalid pagination cursor"}
+            safe_page = None
+            page_cursor = articles_collection.find({**query, "_id": {"$lt": before_id}}, projection).sort("_id", -1).limit(limit + 1)
+        else:
+            # Enforce safe bounds
+            safe_page = max(1, min(page, total_pages))
+            skip = (safe_page - 1) * limit
+            if skip > MAX_PAGE_OFFSET:
+                return {"error": "Page too deep, continue from next_cursor"}
+            page_cursor = articles_collection.find(query, projection).sort("_id", -1).skip(skip).limit(limit + 1)
+        
+        # Fetch one extra article to know whether another page follows
+        articles = await page_cursor.to_list(length=limit + 1)
+        next_cursor = encode_cursor(articles[limit - 1]["_id"], fingerprint) if len(articles) > limit else None
+        articles = articles[:limit]
     
     result = []
     for art in articles:
@@ -106,8 +239,8 @@ async def get_articles(
         genre = art.get("genre", "General")
         
         is_available = True
-        if lang.lower() in ["hi", "ta"]:
-            trans = art.get("translations", {}).get(lang.lower())
+        if lang in ["hi", "ta"]:
+            trans = art.get("translations", {}).get(lang)
             if trans:
                 # If explicit False, then it failed. If missing, assume True (old records)
                 if trans.get("is_available") is False:
@@ -133,33 +266,56 @@ async def get_articles(
             "total_articles": total_articles,
             "total_pages": total_pages,
             "current_page": safe_page,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
     }
 
+@app.get("/api/articles/suggest")
+async def get_article_suggestions(q: str = "", lang: str = "en", limit: int = 8, current_user: dict = Depends(get_current_user)):
+    """API: Typeahead headline suggestions from the in-memory prefix index (no database round trip)"""
+    return {"suggestions": suggest_index.suggest(q, lang.lower(), limit)}
+
 @app.get("/api/genres")
-async def get_genres(current_user: dict = Depends(get_current_user)):
-    """API: Return a list of all unique genres currently in the database."""
-    genres = await articles_collection.distinct("genre", {"processing_status": "PASS"})
-    # Filter out empty or None genres, sort alphabetically
-    valid_genres = sorted([g for g in genres if g and isinstance(g, str)])
-    return {"genres": ["All"] + valid_genres}
+async def get_genres(request: Request, lang: str = "en", current_user: dict = Depends(get_current_user)):
+    """API: Return all genres with published articles, with per-genre counts and translated labels."""
+    async def compute():
+        catalog = await list_genres(lang.lower())
+        return {
+            "genres": ["All"] + [g["name"] for g in catalog],
+            "counts": {g["name"]: g["count"] for g in catalog},
+            "labels": {g["name"]: g["label"] for g in catalog},
+        }
+    return await cached_json_response(request, "genres", [lang.lower()], compute)
 
 from bson import ObjectId
 
 @app.get("/api/articles/{article_id}")
-async def get_article_detail(article_id: str, lang: str = "en", current_user: dict = Depends(get_current_user)):
+async def get_article_detail(request: Request, article_id: str, lang: str = "en", current_user: dict = Depends(get_current_user)):
     """API: Return full article detail, fact verification, and quizzes"""
     try:
         obj_id = ObjectId(article_id)
     except:
         return {"error": "Invalid Article ID format"}
-        
-    article = await articles_collection.find_one({"_id": obj_id})
-    if not article:
-        return {"error": "Article not found"}
-        
-    article = item_helper(article)
+    
+    lang = lang.lower()
+    async def load():
+        article = await load_article(obj_id)
+        if not article:
+            return {"error": "Article not found"}
+        return encode_payload(render_article_detail(article, lang))
+    # Rendered payloads are cached per worker (already serialized, with a content-hash ETag);
+    # concurrent misses share one database read
+    detail = await detail_cache.get_or_load((str(obj_id), lang), load, cacheable=lambda payload: isinstance(payload, EncodedPayload))
+    if not isinstance(detail, EncodedPayload):
+        return detail
+    if etag_matches(request, detail.etag):
+        return not_modified(detail.etag)
+    return json_response(detail)
+
+def render_article_detail(article, lang):
+    """Builds the detail payload of a full (body-merged) article document for one language."""
+    article = item_helper(dict(article))
     
     formatted_quizzes = []
     for q in article.get("quizzes", []):
@@ -183,8 +339,8 @@ async def get_article_detail(article_id: str, lang: str = "en", current_user: di
     
     response_data["is_available"] = True
     
-    if lang.lower() in ["hi", "ta"]:
-        trans = article.get("translations", {}).get(lang.lower())
+    if lang in ["hi", "ta"]:
+        trans = article.get("translations", {}).get(lang)
         if trans:
             if trans.get("is_available") is False:
                 response_data["is_available"] = False
@@ -205,20 +361,31 @@ async def get_article_detail(article_id: str, lang: str = "en", current_user: di
                     response_data["quizzes"] = translated_quizzes
     return response_data
 
+async def warm_detail_cache():
+    """Renders the newest articles into this worker's detail cache in every language."""
+    try:
+        latest = await articles_collection.find({"processing_status": "PASS"}).sort("_id", -1).limit(DETAIL_CACHE_WARM_ARTICLES).to_list(length=DETAIL_CACHE_WARM_ARTICLES)
+        for article in await attach_bodies(latest):
+            for lang in ("en", "hi", "ta"):
+                detail_cache.put((str(article["_id"]), lang), encode_payload(render_article_detail(article, lang)))
+        print(f"Warmed detail cache with {len(latest)} articles")
+    except Exception as e:
+        print(f"Error warming detail cache: {e}")
+
 import io
 import asyncio
 from fastapi.responses import StreamingResponse
 from fastapi import HTTPException
-from auth import SECRET_KEY, ALGORITHM
-from jose import jwt, JWTError
+from auth import decode_access_token
+from jose import JWTError
 
 @app.get("/api/tts/{article_id}")
-async def get_article_tts(article_id: str, lang: str = "en", token: str = None):
+async def get_article_tts(request: Request, article_id: str, lang: str = "en", token: str = None):
     """API: Stream MP3 chunks of the simplified article text in the requested language"""
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid token")
@@ -230,7 +397,7 @@ async def get_article_tts(article_id: str, lang: str = "en", token: str = None):
     except:
         return {"error": "Invalid Article ID format"}
         
-    article = await articles_collection.find_one({"_id": obj_id})
+    article = await load_article(obj_id)
     if not article:
         return {"error": "Article not found"}
         
@@ -245,21 +412,17 @@ async def get_article_tts(article_id: str, lang: str = "en", token: str = None):
         return {"error": "No text available to read"}
         
     try:
-        from gtts import gTTS
-        from fastapi.responses import Response
-        import io
-        import asyncio
-        
-        def generate_audio():
-            tts = gTTS(text=text_to_read, lang=lang.lower(), slow=False)
-            fp_buffer = io.BytesIO()
-            tts.write_to_fp(fp_buffer)
-            return fp_buffer.getvalue()
-
-        # Run the blocking network audio generation in a separate thread
-        audio_content = await asyncio.to_thread(generate_audio)
-        
-        return Response(content=audio_content, media_type="audio/mpeg")
+        # Audio is content-addressed: a matching ETag means the client already has these bytes
+        key = article_audio_key(text_to_read, lang.lower())
+        etag = audio_etag(key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        # One disk read when the whole article was played before (by any worker)
+        audio_content = await asyncio.to_thread(audio_cache.get, key)
+        if audio_content is not None:
+            return bytes_response(request, audio_content, etag, "audio/mpeg")
+        # First play: stream sentence segments as they are synthesized
+        return StreamingResponse(stream_audio(text_to_read, lang.lower()), media_type="audio/mpeg")
     except Exception as e:
         print(f"TTS Generation Error: {e}")
         return {"error": "Failed to generate audio"}
@@ -271,30 +434,26 @@ class TTSSnippetRequest(BaseModel):
     lang: str = "en"
 
 @app.post("/api/tts/snippet")
-async def get_tts_snippet(request: TTSSnippetRequest, current_user: dict = Depends(get_current_user)):
-    """API: Generate MP3 audio for a specific text snippet instantly"""
-    if not request.text or len(request.text.strip()) == 0:
+async def get_tts_snippet(tts_request: TTSSnippetRequest, request: Request, current_user: dict = Depends(get_current_user)):
+    """API: Generate MP3 audio for a specific text snippet instantly (cached on disk by text and language)"""
+    if not tts_request.text or len(tts_request.text.strip()) == 0:
         return {"error": "Empty text string"}
     try:
-        from gtts import gTTS
-        from fastapi.responses import Response
-        import io
-        import asyncio
-        
-        def generate_snippet():
-            tts = gTTS(text=request.text, lang=request.lang.lower(), slow=False)
-            fp_buffer = io.BytesIO()
-            tts.write_to_fp(fp_buffer)
-            return fp_buffer.getvalue()
-
-        audio_content = await asyncio.to_thread(generate_snippet)
-        return Response(content=audio_content, media_type="audio/mpeg")
+        etag = audio_etag(audio_key(tts_request.text, tts_request.lang.lower()))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        audio_content, key = await get_audio(tts_request.text, tts_request.lang.lower(), user_id=current_user["id"])
+        return bytes_response(request, audio_content, audio_etag(key), "audio/mpeg")
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=429, detail="Too many audio requests, slow down",
+                            headers={"Retry-After": str(max(1, round(e.retry_after)))})
+    except PoolSaturated:
+        raise HTTPException(status_code=503, detail="Audio service is busy, please retry shortly",
+                            headers={"Retry-After": "2"})
     except Exception as e:
         print(f"TTS Snippet Error: {e}")
         return {"error": "Failed to generate audio snippet"}
 
-from mongodb import metrics_collection
-
 @app.post("/api/quiz/{article_id}")
 async def submit_quiz(article_id: str, request: Request, current_user: dict = Depends(get_current_user)):
     """API: Submit quiz answers and return score"""
@@ -306,31 +465,14 @@ async def submit_quiz(article_id: str, request: Request, current_user: dict = De
     except:
         return {"error": "Invalid Article ID format"}
         
-    article = await articles_collection.find_one({"_id": obj_id})
-    if not article:
+    # Compact answer key (cached per worker) instead of the full article document
+    answer_key = await answer_key_cache.get(obj_id)
+    if answer_key is None:
         return {"error": "Article not found"}
         
-    correct_count = 0
-    quizzes = article.get("quizzes", [])
-    total_count = len(quizzes)
+    correct_count, total_count, correct_answers_map = score_answers(answer_key, answers)
     
     if total_count > 0:
-        correct_answers_map = {}
-        for quiz in quizzes:
-            quiz_id_str = str(quiz.get("id"))
-            selected_id = answers.get(quiz_id_str)
-            
-            # Find the correct answer for this question
-            correct_ans = next((a for a in quiz.get("answers", []) if a.get("is_correct")), None)
-            if correct_ans:
-                correct_answers_map[quiz_id_str] = {
-                    "id": str(correct_ans.get("id")),
-                    "text": correct_ans.get("answer_text")
-                }
-                
-            if str(selected_id) == str(correct_ans.get("id", "")):
-                correct_count += 1
-                    
         score_pct = (correct_count / total_count) * 100
         
         from datetime import datetime, timezone, timedelta
@@ -344,9 +486,12 @@ async def submit_quiz(article_id: str, request: Request, current_user: dict = De
             "quiz_score_pct": score_pct,
             "time_on_page_seconds": 120,
             "viewed_original": payload.get("viewed_original", False),
+            "lang": metric_lang(payload.get("lang", "en")),
+            "question_results": question_results(answer_key, answers),
+            "ts": datetime.now(timezone.utc),
             "created_at": str(os.getenv("CURRENT_TIME", lambda: datetime.now(ist_tz).isoformat()) if callable(os.getenv("CURRENT_TIME")) else os.getenv("CURRENT_TIME", datetime.now(ist_tz).isoformat()))
         }
-        await metrics_collection.insert_one(metric_doc)
+        await metrics_buffer.record(metric_doc)
         
         return {
             "score": score_pct, 
@@ -358,8 +503,13 @@ async def submit_quiz(article_id: str, request: Request, current_user: dict = De
 
 import datetime
 
+def metric_lang(lang):
+    """Language recorded with a metric event; it keys engagement buckets, so unknown values become English"""
+    lang = str(lang).lower()
+    return lang if lang in SUPPORTED_LANGUAGES else "en"
+
 @app.post("/api/articles/{article_id}/view")
-async def record_article_view(article_id: str, current_user: dict = Depends(get_current_user)):
+async def record_article_view(article_id: str, lang: str = "en", current_user: dict = Depends(get_current_user)):
     """API: Record an article view for a user"""
     try:
         obj_id = ObjectId(article_id)
@@ -372,102 +522,27 @@ async def record_article_view(article_id: str, current_user: dict = Depends(get_
         "user_id": current_user["id"],
         "article_id": str(obj_id),
         "action": "view",
+        "lang": metric_lang(lang),
+        "ts": datetime.now(timezone.utc),
         "created_at": datetime.now(ist_tz).isoformat()
     }
-    await metrics_collection.insert_one(metric_doc)
+    await metrics_buffer.record(metric_doc)
     return {"status": "success"}
 
 @app.get("/api/user/stats")
 async def get_user_stats(lang: str = "en", current_user: dict = Depends(get_current_user)):
-    """API: Get personalized dashboard metrics"""
-    user_id = current_user["id"]
-    
-    # Get all metrics for this specific user, sorted by newest first
-    cursor = metrics_collection.find({"user_id": user_id}).sort("created_at", -1)
-    user_metrics = await cursor.to_list(length=1000)
-    
-    view_metrics = [m for m in user_metrics if m.get("action") == "view"]
-    quiz_metrics = [m for m in user_metrics if m.get("action") == "quiz"]
-    
-    total_articles_read = len(set(m.get("article_id") for m in view_metrics))
-    avg_score = sum(m.get("quiz_score_pct", 0) for m in quiz_metrics) / len(quiz_metrics) if quiz_metrics else 0
-    
-    # Collect all unique article IDs from metrics to fetch titles
-    all_article_ids_str = list(set([m.get("article_id") for m in user_metrics if m.get("article_id")]))
-    
-    article_headlines = {}
-    avg_readability = 0
-    
-    if all_article_ids_str:
-        try:
-            object_ids = [ObjectId(aid) for aid in all_article_ids_str]
-            articles_cursor = articles_collection.find({"_id": {"$in": object_ids}})
-            all_articles = await articles_cursor.to_list(length=1000)
-            
-            # Map ID to Headline for quick lookup
-            article_headlines = {str(a["_id"]): a.get("simplified_headline", "Unknown Article") for a in all_articles}
-            
-            # Calculate average readability only for articles they viewed
-            read_article_ids_str = set(m.get("article_id") for m in view_metrics if m.get("article_id"))
-            read_articles = [a for a in all_articles if str(a["_id"]) in read_article_ids_str]
-            if read_articles:
-                avg_readability = sum(a.get("readability_score", 0) for a in read_articles) / len(read_articles)
-        except Exception as e:
-            print(f"Error fetching articles for stats: {e}")
-            
-    global_total = await articles_collection.count_documents({"processing_status": "PASS"})
-    
-    # Build Reading History (limit 5 unique articles)
-    reading_history = []
-    seen_articles_history = set()
-    for m in view_metrics:
-        aid = m.get("article_id")
-        if aid not in seen_articles_history and aid in article_headlines:
-            headline = article_headlines[aid]
-            if lang.lower() in ["hi", "ta"]:
-                art_doc = next((a for a in all_articles if str(a.get("_id")) == aid), None)
-                if art_doc:
-                    trans = art_doc.get("translations", {}).get(lang.lower())
-                    if trans:
-                        headline = trans.get("headline", headline)
-                        
-            reading_history.append({
-                "article_id": aid,
-                "headline": headline,
-                "date": m.get("created_at")
-            })
-            seen_articles_history.add(aid)
-            if len(reading_history) >= 5:
-                break
-                
-    # Build Quiz History (limit 5 recent quizzes)
-    quiz_history = []
-    for m in quiz_metrics:
-        aid = m.get("article_id")
-        headline = article_headlines.get(aid, "Unknown Article")
-        if aid and lang.lower() in ["hi", "ta"]:
-            art_doc = next((a for a in all_articles if str(a.get("_id")) == aid), None)
-            if art_doc:
-                trans = art_doc.get("translations", {}).get(lang.lower())
-                if trans:
-                    headline = trans.get("headline", headline)
-
-        quiz_history.append({
-            "article_id": aid,
-            "headline": headline,
-            "score": m.get("quiz_score_pct", 0),
-            "date": m.get("created_at")
-        })
-        if len(quiz_history) >= 5:
-            break
-            
+    """API: Get personalized dashboard metrics (one rollup read, maintained as metric events are written)"""
+    stats, global_total = await asyncio.gather(
+        load_user_stats(current_user["id"], lang.lower()),
+        published_total(),
+    )
     return {
-        "articles_read": total_articles_read,
+        "articles_read": stats["articles_read"],
         "global_total_articles": global_total,
-        "avg_score": round(avg_score, 1),
-        "avg_readability": round(avg_readability, 2),
-        "reading_history": reading_history,
-        "quiz_history": quiz_history
+        "avg_score": stats["avg_score"],
+        "avg_readability": stats["avg_readability"],
+        "reading_history": stats["reading_history"],
+        "quiz_history": stats["quiz_history"]
     }
 
 @app.post("/api/admin/ingest")
@@ -476,5 +551,37 @@ async def trigger_ingestion(current_user: dict = Depends(get_current_user)):
     result = await ingest_rss_feed()
     return result
 
+@app.get("/api/admin/analytics")
+async def get_engagement_analytics(dimension: str = "genre", days: int = 7, granularity: str = "day", limit: int = 50,
+                                   current_user: dict = Depends(get_current_user)):
+    """
+    API: Views, quiz attempts and average quiz score per article, genre or language over the
+    last `days` days (days <= 0 for all time), summed from pre-aggregated buckets
+    """
+    if dimension not in DIMENSIONS:
+        return {"error": f"dimension must be one of {', '.join(DIMENSIONS)}"}
+    if granularity not in ("hour", "day"):
+        return {"error": "granularity must be hour or day"}
+    rows = await engagement_report(dimension, days if days > 0 else None, granularity, max(1, min(limit, 500)))
+    return {"dimension": dimension, "days": days if days > 0 else None, "rows": rows}
+
+@app.get("/api/admin/quiz-report")
+async def get_quiz_report(order: str = "difficulty", min_attempts: int = MIN_REPORT_ATTEMPTS, question_type: str = "",
+                          limit: int = 50, current_user: dict = Depends(get_current_user)):
+    """
+    API: Quiz questions ranked worst first by difficulty or discrimination, with per-distractor
+    pick counts and flags, from incrementally maintained per-question counters.
+    question_type filters by generator ("ai_generated" or "dynamic" for the fallback).
+    """
+    if order not in ("difficulty", "discrimination"):
+        return {"error": "order must be difficulty or discrimination"}
+    questions = await question_report(order, max(1, min_attempts), question_type or None, max(1, min(limit, 500)))
+    return {"order": order, "questions": questions}
+
+@app.get("/api/admin/cache-stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    """API: Hit rates of this worker's caches and the load on its password hashing pool"""
+    return {"detail_cache": detail_cache.stats(), "response_cache": response_cache.stats(), "hashing_pool": hashing_pool.stats(), "audio_cache": audio_cache.stats(), "synthesis_pool": synthesis_pool.stats(), "audio_pregeneration": pregeneration_stats(), "metrics_buffer": metrics_buffer.stats()}
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=True)
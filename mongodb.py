@@ -14,6 +14,17 @@ db = client.ainewsplatform
 users_collection = db.get_collection("users")
 articles_collection = db.get_collection("articles")
 metrics_collection = db.get_collection("metrics")
+# Compressed heavy article fields (raw text, simplified text, quizzes, translated copies)
+article_bodies_collection = db.get_collection("article_bodies")
+# Materialized genre catalog with per-genre article counts and translated labels
+genres_collection = db.get_collection("genres")
+# Per-user dashboard rollups, and one document per (user, article) read for distinct counts
+user_stats_collection = db.get_collection("user_stats")
+user_reads_collection = db.get_collection("user_reads")
+# Hourly/daily/all-time engagement counters per article, genre and language
+engagement_collection = db.get_collection("engagement")
+# Per-question quiz counters (attempts, correct, answer picks, rest-score sums)
+quiz_stats_collection = db.get_collection("quiz_stats")
 
 # Helper map to stringify ObjectIDs
 def item_helper(item) -> dict:
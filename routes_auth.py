@@ -6,7 +6,18 @@ from datetime import timedelta
 import os
 
 from mongodb import users_collection, item_helper
-from auth import get_password_hash, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
+from auth import get_password_hash_async, verify_password_async, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user, invalidate_user
+from services.bounded_executor import PoolSaturated
+
+# Sent when the password hashing pool is saturated, so clients back off instead of piling up
+SATURATED_RETRY_AFTER_SECONDS = "2"
+
+def saturated_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts right now, please retry shortly",
+        headers={"Retry-After": SATURATED_RETRY_AFTER_SECONDS},
+    )
 
 router = APIRouter()
 
@@ -35,8 +46,11 @@ async def register(user: UserRegister):
     if existing_username:
         raise HTTPException(status_code=400, detail="Username already taken")
 
-    # Hash password
-    hashed_password = get_password_hash(user.password)
+    # Hash password off the event loop
+    try:
+        hashed_password = await get_password_hash_async(user.password)
+    except PoolSaturated:
+        raise saturated_exception()
     
     # Create user doc
     new_user = {
@@ -74,10 +88,16 @@ async def login(user_credentials: UserLogin):
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Credentials"
         )
 
-    if not verify_password(user_credentials.password, user["hashed_password"]):
+    try:
+        password_ok = await verify_password_async(user_credentials.password, user["hashed_password"])
+    except PoolSaturated:
+        raise saturated_exception()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials"
         )
+    # Signing in again is how a user picks up an account change made in another worker
+    invalidate_user(user["_id"])
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+from mongodb import articles_collection
+from services.article_store import build_answer_key, load_body
+
+ANSWER_KEY_CACHE_MAX_ENTRIES = 5000
+
+class AnswerKeyCache:
+    """
+    Per-worker LRU of article answer keys, backed by a query that projects only `answer_key`.
+    Articles stored before answer keys existed are keyed from their quizzes once and backfilled.
+    """
+
+    def __init__(self, max_entries=ANSWER_KEY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    async def get(self, article_id):
+        """Returns the answer key of an article, or None if the article doesn't exist."""
+        answer_key = self._entries.get(article_id)
+        if answer_key is not None:
+            self._entries.move_to_end(article_id)
+            return answer_key
+
+        doc = await articles_collection.find_one({"_id": article_id}, {"answer_key": 1, "has_body": 1, "quizzes": 1})
+        if doc is None:
+            return None
+        answer_key = doc.get("answer_key")
+        # Keys stored before they carried the answer choices are rebuilt like missing ones
+        if answer_key is None or any("choices" not in entry for entry in answer_key):
+            quizzes = doc.get("quizzes")
+            if quizzes is None and doc.get("has_body"):
+                quizzes = (await load_body(article_id)).get("quizzes")
+            answer_key = build_answer_key(quizzes)
+            await articles_collection.update_one({"_id": article_id}, {"$set": {"answer_key": answer_key}})
+
+        self._entries[article_id] = answer_key
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return answer_key
+
+def score_answers(answer_key, answers):
+    """
+    Returns (correct count, total, {quiz_id: {"id", "text"}}) for submitted {quiz_id: answer_id}.
+    Questions without a correct answer are not scored and not part of the total.
+    """
+    correct_count = 0
+    correct_answers_map = {}
+    for entry in answer_key:
+        if entry["answer_id"] is None:
+            continue
+        correct_answers_map[entry["quiz_id"]] = {"id": entry["answer_id"], "text": entry["text"]}
+        if str(answers.get(entry["quiz_id"])) == entry["answer_id"]:
+            correct_count += 1
+    return correct_count, len(correct_answers_map), correct_answers_map
+
+def question_results(answer_key, answers):
+    """
+    Per-question outcome of a submission: [{"quiz_id", "answer_id" (selected or None), "correct"}].
+    A selection that is not one of the question's choices counts as unanswered, since the
+    id comes from the client and is used as a counter field name.
+    """
+    results = []
+    for entry in answer_key:
+        if entry["answer_id"] is None:
+            continue
+        selected = answers.get(entry["quiz_id"])
+        choice_ids = {choice[0] for choice in entry.get("choices", [])}
+        selected = str(selected) if selected is not None and str(selected) in choice_ids else None
+        results.append({
+            "quiz_id": entry["quiz_id"],
+            "answer_id": selected,
+            "correct": selected == entry["answer_id"],
+        })
+    return results
+
+answer_key_cache = AnswerKeyCache()
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import zlib
+
+from mongodb import articles_collection, article_bodies_collection
+from services.response_cache import response_cache
+from services import genre_catalog
+
+# Heavy fields moved out of `articles` into the compressed `article_bodies` collection.
+# Paths are relative to the article document; translated copies live under translations.<lang>.
+BODY_FIELDS = (("simplified_text",), ("original", "raw_text"), ("quizzes",))
+TRANSLATION_BODY_FIELDS = ("simplified_text", "original_text", "quizzes")
+TRANSLATION_LANGUAGES = ("hi", "ta")
+BODY_ENCODING = "zlib+json"
+
+# Projections that fetch only what the list and stats views render
+def list_projection(lang="en"):
+    projection = {
+        "simplified_headline": 1,
+        "genre": 1,
+        "word_count": 1,
+        "readability_score": 1,
+        "original.publisher_name": 1,
+        "original.published_date": 1,
+    }
+    if lang in TRANSLATION_LANGUAGES:
+        projection[f"translations.{lang}.headline"] = 1
+        projection[f"translations.{lang}.genre"] = 1
+        projection[f"translations.{lang}.is_available"] = 1
+    return projection
+
+def headline_projection(lang="en"):
+    projection = {"simplified_headline": 1, "readability_score": 1}
+    if lang in TRANSLATION_LANGUAGES:
+        projection[f"translations.{lang}.headline"] = 1
+    return projection
+
+def split_article(article):
+    """Splits an article document into (slim document, body). Neither input dict is modified."""
+    slim = dict(article)
+    body = {}
+    for path in BODY_FIELDS:
+        parent, body_parent = slim, body
+        for key in path[:-1]:
+            if key not in parent:
+                break
+            parent[key] = dict(parent[key])
+            parent = parent[key]
+            body_parent = body_parent.setdefault(key, {})
+        else:
+            if path[-1] in parent:
+                body_parent[path[-1]] = parent.pop(path[-1])
+    translations = slim.get("translations")
+    if translations:
+        slim["translations"] = {}
+        for lang, trans in translations.items():
+            trans = dict(trans)
+            moved = {f: trans.pop(f) for f in TRANSLATION_BODY_FIELDS if f in trans}
+            if moved:
+                body.setdefault("translations", {})[lang] = moved
+            slim["translations"][lang] = trans
+    if "quizzes" in body:
+        # Kept on the slim document so quiz scoring never reads the body
+        slim["answer_key"] = build_answer_key(body["quizzes"])
+    return slim, body
+
+def build_answer_key(quizzes):
+    """
+    Compact scoring data for quizzes: [{"quiz_id", "answer_id", "text", "question", "type", "choices"}],
+    answer_id None if no answer is marked correct; choices is [[answer_id, text], ...].
+    """
+    answer_key = []
+    for quiz in quizzes or []:
+        correct = next((a for a in quiz.get("answers", []) if a.get("is_correct")), None)
+        answer_key.append({
+            "quiz_id": str(quiz.get("id")),
+            "answer_id": str(correct.get("id")) if correct else None,
+            "text": correct.get("answer_text") if correct else None,
+            "question": quiz.get("question_text"),
+            "type": quiz.get("question_type"),
+            "choices": [[str(a.get("id")), a.get("answer_text")] for a in quiz.get("answers", [])],
+        })
+    return answer_key
+
+def merge_body(article, body):
+    """Deep-merges a decoded body back into a (slim) article document in place."""
+    for key, value in body.items():
+        if isinstance(value, dict) and isinstance(article.get(key), dict):
+            merge_body(article[key], value)
+        else:
+            article[key] = value
+    return article
+
+def compress_body(body):
+    return zlib.compress(json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+
+def decompress_body(body_doc):
+    return json.loads(zlib.decompress(body_doc["payload"]).decode("utf-8"))
+
+async def save_article(article):
+    """Stores an article as a slim document plus a compressed body. Sets article["_id"]."""
+    # A missing genre is stored as the default, so feed filters, the search index and the
+    # catalog all agree on it
+    if not article.get("genre"):
+        article["genre"] = genre_catalog.DEFAULT_GENRE
+    slim, body = split_article(article)
+    slim["has_body"] = True
+    result = await articles_collection.insert_one(slim)
+    article["_id"] = result.inserted_id
+    await article_bodies_collection.insert_one({
+        "_id": result.inserted_id,
+        "encoding": BODY_ENCODING,
+        "payload": compress_body(body),
+    })
+    await genre_catalog.record_article(article)
+    # Every published insert invalidates cached feed pages in all workers; FAIL documents
+    # never appear in a feed
+    if article.get("processing_status") == "PASS":
+        response_cache.bump_generation()
+    return result.inserted_id
+
+async def load_body(article_id):
+    """Returns the decoded body of an article, or {} for legacy documents that still embed it."""
+    body_doc = await article_bodies_collection.find_one({"_id": article_id})
+    return decompress_body(body_doc) if body_doc else {}
+
+async def load_article(article_id, projection=None):
+    """Detail read: the slim document merged with its body, or None if the article doesn't exist."""
+    article, body = await asyncio.gather(
+        articles_collection.find_one({"_id": article_id}, projection),
+        load_body(article_id),
+    )
+    if not article:
+        return None
+    return merge_body(article, body)
+
+async def attach_bodies(articles):
+    """Merges bodies into a batch of slim documents with one $in query."""
+    ids = [a["_id"] for a in articles if a.get("has_body")]
+    if ids:
+        bodies = {}
+        async for body_doc in article_bodies_collection.find({"_id": {"$in": ids}}):
+            bodies[body_doc["_id"]] = decompress_body(body_doc)
+        for article in articles:
+            if article["_id"] in bodies:
+                merge_body(article, bodies[article["_id"]])
+    return articles
+
+async def migrate_embedded_bodies(batch_size=100):
+    """Moves heavy fields of legacy articles into article_bodies. Safe to re-run."""
+    migrated = 0
+    cursor = articles_collection.find({"has_body": {"$ne": True}})
+    async for article in cursor:
+        slim, body = split_article(article)
+        if body:
+            await article_bodies_collection.replace_one(
+                {"_id": article["_id"]},
+                {"_id": article["_id"], "encoding": BODY_ENCODING, "payload": compress_body(body)},
+                upsert=True,
+            )
+        slim["has_body"] = True
+        await articles_collection.replace_one({"_id": article["_id"]}, slim)
+        migrated += 1
+        if migrated % batch_size == 0:
+            print(f"Migrated {migrated} articles...")
+    response_cache.bump_generation()
+    print(f"Moved bodies of {migrated} articles into article_bodies")
+    return migrated
+
+if __name__ == "__main__":
+    asyncio.run(migrate_embedded_bodies())
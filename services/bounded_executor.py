@@ -0,0 +1,48 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class PoolSaturated(Exception):
+    """Raised when a bounded executor already has its maximum number of jobs queued."""
+
+class BoundedExecutor:
+    """
+    Dedicated thread pool for CPU-heavy calls with a cap on queued jobs. run() fails fast
+    with PoolSaturated instead of letting a burst build an unbounded backlog.
+    """
+
+    def __init__(self, workers, max_queue, name):
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.in_flight} jobs already in flight")
+            self.in_flight += 1
+        job = self._executor.submit(fn, *args)
+        # A job leaves the count when its thread is done (or it is cancelled while still
+        # queued), not when the awaiting caller is cancelled and the thread keeps running
+        job.add_done_callback(self._job_done)
+        return await asyncio.wrap_future(job)
+
+    def _job_done(self, job):
+        with self._lock:
+            self.in_flight -= 1
+            if not job.cancelled():
+                self.completed += 1
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,98 @@
+import json
+from collections import OrderedDict
+
+from services.single_flight import SingleFlight
+
+# Bounds for rendered article detail payloads kept in each worker
+DETAIL_CACHE_MAX_ENTRIES = 2000
+DETAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Newest articles rendered into the cache (in every language) when a worker starts
+DETAIL_CACHE_WARM_ARTICLES = 50
+
+def payload_size(payload):
+    """Memory cost of a payload: its serialized body, or the size of its JSON encoding."""
+    body = getattr(payload, "body", None)
+    if body is not None:
+        return len(body)
+    return len(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+class DetailCache:
+    """
+    LRU cache of rendered article detail payloads keyed by (article_id, lang), bounded by
+    both entry count and total payload bytes. Concurrent misses on the same key share one load.
+    """
+
+    def __init__(self, max_entries=DETAIL_CACHE_MAX_ENTRIES, max_bytes=DETAIL_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._flights = SingleFlight()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, payload):
+        size = payload_size(payload)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        self._entries[key] = (payload, size)
+        self.total_bytes += size
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+            self.evictions += 1
+
+    async def get_or_load(self, key, load, cacheable=lambda payload: True):
+        """Returns the cached payload for `key`, or awaits load() once for all concurrent callers."""
+        payload = self.get(key)
+        if payload is not None:
+            self.hits += 1
+            return payload
+
+        if self._flights.in_flight(key):
+            self.coalesced += 1
+        else:
+            self.misses += 1
+
+        async def load_and_store():
+            payload = await load()
+            if cacheable(payload):
+                self.put(key, payload)
+            return payload
+
+        return await self._flights.join(key, load_and_store)
+
+    def invalidate(self, article_id):
+        """Drops every language of one article."""
+        for key in [k for k in self._entries if k[0] == article_id]:
+            self.total_bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
+
+detail_cache = DetailCache()
@@ -0,0 +1,125 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+
+from mongodb import articles_collection, metrics_collection, engagement_collection
+from services.search_index import SUPPORTED_LANGUAGES
+
+# Every event is counted in an hourly, a daily and an all-time bucket
+GRANULARITIES = ("hour", "day", "all")
+DIMENSIONS = ("article", "genre", "lang")
+ALL_TIME = datetime(1970, 1, 1, tzinfo=timezone.utc)
+REBUILD_BATCH_SIZE = 500
+
+def event_time(event):
+    """UTC timestamp of a metric event: its `ts`, or its ISO `created_at` for older events."""
+    ts = event.get("ts")
+    if isinstance(ts, datetime):
+        return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(str(event.get("created_at")))
+    except ValueError:
+        return None
+    return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).astimezone(timezone.utc)
+
+def bucket_start(ts, granularity):
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ALL_TIME
+
+def bucket_id(granularity, start, dimension, key):
+    return f"{granularity}:{start.strftime('%Y%m%d%H')}:{dimension}:{key}"
+
+async def _article_genres(article_ids):
+    object_ids = []
+    for aid in set(article_ids):
+        try:
+            object_ids.append(ObjectId(aid))
+        except (InvalidId, TypeError):
+            continue
+    return {str(a["_id"]): a.get("genre") or "General"
+            async for a in articles_collection.find({"_id": {"$in": object_ids}}, {"genre": 1})}
+
+async def apply_events(events):
+    """
+    Adds a batch of view/quiz events to the time-bucketed counters with one bulk of $inc
+    upserts. Registered as a metrics buffer sink.
+    """
+    events = [e for e in events if e.get("article_id") and e.get("action") in ("view", "quiz")]
+    if not events:
+        return
+    genres = await _article_genres(e["article_id"] for e in events)
+
+    increments = {}
+    for e in events:
+        ts = event_time(e)
+        if ts is None:
+            continue
+        # Older events stored the raw query parameter; never let it mint new buckets
+        lang = e.get("lang") if e.get("lang") in SUPPORTED_LANGUAGES else "en"
+        keys = {"article": e["article_id"], "genre": genres.get(e["article_id"], "General"), "lang": lang}
+        if e["action"] == "view":
+            counters = {"views": 1}
+        else:
+            counters = {"quizzes": 1, "quiz_score_sum": e.get("quiz_score_pct", 0)}
+        for granularity in GRANULARITIES:
+            start = bucket_start(ts, granularity)
+            for dimension, key in keys.items():
+                _id = bucket_id(granularity, start, dimension, key)
+                entry = increments.setdefault(_id, ({"granularity": granularity, "bucket": start, "dimension": dimension, "key": key}, {}))
+                for name, value in counters.items():
+                    entry[1][name] = entry[1].get(name, 0) + value
+
+    ops = [UpdateOne({"_id": _id}, {"$setOnInsert": fields, "$inc": counters}, upsert=True)
+           for _id, (fields, counters) in increments.items()]
+    if ops:
+        await engagement_collection.bulk_write(ops, ordered=False)
+
+async def engagement_report(dimension="genre", days=7, granularity="day", limit=50):
+    """
+    Sums the counters of `dimension` over the last `days` days (or all time if days is None)
+    from at most a few hundred bucket documents. Rows are sorted by views.
+    """
+    query = {"dimension": dimension}
+    if days is None:
+        query.update({"granularity": "all"})
+    else:
+        now = datetime.now(timezone.utc)
+        query.update({"granularity": granularity, "bucket": {"$gte": bucket_start(now - timedelta(days=days), granularity)}})
+
+    totals = {}
+    async for bucket in engagement_collection.find(query, {"key": 1, "views": 1, "quizzes": 1, "quiz_score_sum": 1}):
+        row = totals.setdefault(bucket["key"], {"key": bucket["key"], "views": 0, "quizzes": 0, "quiz_score_sum": 0})
+        for name in ("views", "quizzes", "quiz_score_sum"):
+            row[name] += bucket.get(name, 0)
+
+    rows = sorted(totals.values(), key=lambda r: (-r["views"], -r["quizzes"], str(r["key"])))[:limit]
+    for row in rows:
+        score_sum = row.pop("quiz_score_sum")
+        row["avg_quiz_score"] = round(score_sum / row["quizzes"], 1) if row["quizzes"] else None
+    return rows
+
+async def rebuild_engagement():
+    """Recomputes every bucket by replaying the metrics collection (backfill or repair)."""
+    await engagement_collection.delete_many({})
+    replayed = 0
+    batch = []
+    async for event in metrics_collection.find({"action": {"$in": ["view", "quiz"]}}):
+        batch.append(event)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            await apply_events(batch)
+            replayed += len(batch)
+            batch = []
+    if batch:
+        await apply_events(batch)
+        replayed += len(batch)
+    print(f"Rebuilt engagement buckets from {replayed} metric events")
+    return replayed
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_engagement())
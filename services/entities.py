@@ -0,0 +1,301 @@
+import re
+import threading
+from array import array
+from collections import Counter
+
+from services.text_document import TokenizedDocument
+
+# Regex layer: numbers, dates and percentages
+_MONTHS = r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
+_WEEKDAYS = r"(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)"
+PERCENT_RE = re.compile(r"(?<![\w.])\d+(?:[.,]\d+)*\s?(?:%|per ?cent\b)", re.IGNORECASE)
+DATE_RE = re.compile(
+    r"\b(?:\d{4}-\d{2}-\d{2}"
+    rf"|{_MONTHS}\.?\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS}(?:,?\s+\d{{4}})?"
+    rf"|{_WEEKDAYS})\b"
+)
+NUMBER_RE = re.compile(
+    r"(?<![\w.])[$₹£€]?\d+(?:[.,]\d+)*(?:\s?(?:million|billion|trillion|crore|lakh))?(?![\w%]|[.,]\d)",
+    re.IGNORECASE,
+)
+
+# Cues used to type capitalized phrases while learning the gazetteer
+PERSON_TITLES = frozenset([
+    "mr", "mrs", "ms", "dr", "prof", "president", "minister", "mayor", "governor", "senator",
+    "judge", "justice", "king", "queen", "prince", "princess", "pope", "ceo", "chairman", "sir",
+    "prime", "chief", "deputy", "vice", "former",
+])
+LEADING_DETERMINERS = frozenset(["the", "a", "an"])
+ORG_SUFFIXES = frozenset([
+    "inc", "ltd", "corp", "corporation", "company", "bank", "party", "ministry", "council",
+    "university", "association", "court", "police", "group", "agency", "commission", "board",
+    "committee", "union", "organisation", "organization", "department", "army", "institute",
+    "federation", "league", "club", "authority", "fund", "foundation", "service", "parliament",
+])
+PLACE_SUFFIXES = frozenset([
+    "city", "state", "river", "district", "street", "road", "island", "islands", "province",
+    "county", "valley", "sea", "ocean", "airport", "station", "square", "hall",
+])
+PLACE_PREPOSITIONS = frozenset(["in", "from", "near", "across"])
+
+KIND_ENTITY, KIND_PERSON, KIND_PLACE, KIND_ORG = range(4)
+KIND_NAMES = ("entity", "person", "place", "organisation")
+
+SEED_PLACES = [
+    "India", "China", "Pakistan", "Bangladesh", "Sri Lanka", "Nepal", "United States", "United Kingdom",
+    "Russia", "Ukraine", "Israel", "Gaza", "Iran", "Japan", "France", "Germany", "Canada", "Australia",
+    "New Delhi", "Delhi", "Mumbai", "Chennai", "Kolkata", "Bengaluru", "Hyderabad", "Tamil Nadu",
+    "Kerala", "London", "Washington", "Beijing", "Moscow", "Kyiv", "Paris", "Europe", "Africa", "Asia",
+]
+
+# A phrase without a type cue is learned once it appears in this many distinct articles
+MIN_UNTYPED_ARTICLES = 2
+# Cap on phrases waiting to reach MIN_UNTYPED_ARTICLES, so the pending counter stays bounded
+MAX_PENDING_PHRASES = 50000
+
+class Gazetteer:
+    """
+    Aho-Corasick automaton over known entity names (matched case-insensitively on word boundaries).
+
+    Storage is flat to keep it compact: transitions live in one dict keyed by
+    `state * 0x110000 + codepoint`, and per-state data (failure link, output term,
+    dictionary-suffix link, child list) in `array`s. Terms are inserted incrementally;
+    failure links are recomputed lazily on the next search after an insert.
+    """
+    __slots__ = ("_goto", "_first_child", "_next_sibling", "_char", "_fail", "_term", "_dict_link",
+                 "_terms", "_kinds", "_dirty", "_lock")
+
+    def __init__(self):
+        self._goto = {}
+        self._first_child = array("i", [-1])
+        self._next_sibling = array("i", [-1])
+        self._char = array("I", [0])
+        self._fail = array("i", [0])
+        self._term = array("i", [-1])
+        self._dict_link = array("i", [-1])
+        self._terms = []
+        self._kinds = bytearray()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        state = 0
+        for ch in term.lower():
+            state = self._goto.get(state * 0x110000 + ord(ch), -1)
+            if state < 0:
+                return False
+        return self._term[state] >= 0
+
+    def add(self, term, kind=KIND_ENTITY):
+        """Inserts a term; returns True if it was new. A typed kind overrides a generic one."""
+        term = " ".join(term.split())
+        if len(term) < 2:
+            return False
+        with self._lock:
+            state = 0
+            for ch in term.lower():
+                key = state * 0x110000 + ord(ch)
+                nxt = self._goto.get(key)
+                if nxt is None:
+                    nxt = len(self._fail)
+                    self._goto[key] = nxt
+                    self._first_child.append(-1)
+                    self._next_sibling.append(self._first_child[state])
+                    self._first_child[state] = nxt
+                    self._char.append(ord(ch))
+                    self._fail.append(0)
+                    self._term.append(-1)
+                    self._dict_link.append(-1)
+                state = nxt
+            if self._term[state] >= 0:
+                term_id = self._term[state]
+                if kind != KIND_ENTITY and self._kinds[term_id] == KIND_ENTITY:
+                    self._kinds[term_id] = kind
+                return False
+            self._term[state] = len(self._terms)
+            self._terms.append(term)
+            self._kinds.append(kind)
+            self._dirty = True
+            return True
+
+    def _build_links(self):
+        """Breadth-first recomputation of failure and dictionary-suffix links."""
+        queue = []
+        child = self._first_child[0]
+        while child >= 0:
+            self._fail[child] = 0
+            self._dict_link[child] = -1
+            queue.append(child)
+            child = self._next_sibling[child]
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            child = self._first_child[state]
+            while child >= 0:
+                code = self._char[child]
+                fallback = self._fail[state]
+                while True:
+                    target = self._goto.get(fallback * 0x110000 + code)
+                    if target is not None:
+                        break
+                    if fallback == 0:
+                        target = 0
+                        break
+                    fallback = self._fail[fallback]
+                self._fail[child] = target
+                self._dict_link[child] = target if self._term[target] >= 0 else self._dict_link[target]
+                queue.append(child)
+                child = self._next_sibling[child]
+        self._dirty = False
+
+    def search(self, text):
+        """Returns non-overlapping (start, end, term, kind) matches, preferring the longest at each position."""
+        if self._dirty:
+            with self._lock:
+                if self._dirty:
+                    self._build_links()
+
+        lowered = text.lower()
+        get = self._goto.get
+        fail = self._fail
+        term = self._term
+        dict_link = self._dict_link
+        terms = self._terms
+        size = len(lowered)
+        candidates = []
+        state = 0
+        for pos, ch in enumerate(lowered):
+            code = ord(ch)
+            nxt = get(state * 0x110000 + code)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = get(state * 0x110000 + code)
+            state = nxt or 0
+            out = state if term[state] >= 0 else dict_link[state]
+            while out >= 0:
+                term_id = term[out]
+                start = pos + 1 - len(terms[term_id])
+                if (start == 0 or not lowered[start - 1].isalnum()) and (pos + 1 == size or not lowered[pos + 1].isalnum()):
+                    candidates.append((start, pos + 1, term_id))
+                out = dict_link[out]
+
+        matches = []
+        last_end = 0
+        for start, end, term_id in sorted(candidates, key=lambda m: (m[0], -m[1])):
+            if start >= last_end:
+                matches.append((start, end, self._terms[term_id], KIND_NAMES[self._kinds[term_id]]))
+                last_end = end
+        return matches
+
+def capitalized_runs(doc):
+    """
+    Yields (phrase, previous_word) for runs of capitalized words in a TokenizedDocument.
+    A lone capitalized word at the start of a sentence is skipped, since it is capitalized
+    by position rather than by being a name.
+    """
+    for i in range(doc.sentence_count):
+        words = doc.sentence_words(i)
+        run_start = None
+        for pos, word in enumerate(words + [""]):
+            if word[:1].isupper() and not word[:1].isdigit():
+                if run_start is None:
+                    run_start = pos
+                continue
+            if run_start is not None and (pos - run_start > 1 or run_start > 0):
+                previous = words[run_start - 1].lower() if run_start > 0 else ""
+                yield " ".join(words[run_start:pos]), previous
+            run_start = None
+
+def _classify(phrase, previous):
+    """Returns (name, kind) for a capitalized phrase using title, suffix and preposition cues."""
+    tokens = phrase.split()
+    while len(tokens) > 1 and tokens[0].lower() in LEADING_DETERMINERS:
+        tokens = tokens[1:]
+    titled = previous.rstrip(".") in PERSON_TITLES
+    while len(tokens) > 1 and tokens[0].lower().rstrip(".") in PERSON_TITLES:
+        tokens = tokens[1:]
+        titled = True
+    phrase = " ".join(tokens)
+    if titled:
+        return phrase, KIND_PERSON
+    last = tokens[-1].lower().rstrip(".")
+    if last in ORG_SUFFIXES:
+        return phrase, KIND_ORG
+    if last in PLACE_SUFFIXES or previous in PLACE_PREPOSITIONS:
+        return phrase, KIND_PLACE
+    return phrase, KIND_ENTITY
+
+class EntityExtractor:
+    """Regex layer for numbers/dates/percentages plus a gazetteer learned from past articles."""
+
+    def __init__(self):
+        self.gazetteer = Gazetteer()
+        self._pending = Counter()
+        # learn() also runs in a worker thread while the gazetteer warms up
+        self._pending_lock = threading.Lock()
+        for place in SEED_PLACES:
+            self.gazetteer.add(place, KIND_PLACE)
+
+    def learn(self, text):
+        """
+        Adds the entities of one article to the gazetteer. Phrases with a type cue are
+        learned immediately; untyped multi-word phrases once seen in enough articles.
+        """
+        doc = TokenizedDocument.of(text)
+        added = 0
+        untyped = set()
+        for phrase, previous in capitalized_runs(doc):
+            name, kind = _classify(phrase, previous)
+            if kind != KIND_ENTITY:
+                added += self.gazetteer.add(name, kind)
+            elif len(name.split()) > 1 and name not in self.gazetteer:
+                untyped.add(name)
+        with self._pending_lock:
+            for name in untyped:
+                self._pending[name] += 1
+                if self._pending[name] >= MIN_UNTYPED_ARTICLES:
+                    added += self.gazetteer.add(name, KIND_ENTITY)
+                    del self._pending[name]
+            if len(self._pending) > MAX_PENDING_PHRASES:
+                # Keep the phrases closest to promotion
+                self._pending = Counter(dict(self._pending.most_common(MAX_PENDING_PHRASES // 2)))
+        return added
+
+    def extract(self, text):
+        doc = TokenizedDocument.of(text)
+        body = doc.text
+
+        dates = [m.group(0) for m in DATE_RE.finditer(body)]
+        percentages = [m.group(0) for m in PERCENT_RE.finditer(body)]
+        numbers = [m.group(0) for m in NUMBER_RE.finditer(body)]
+
+        by_kind = {name: [] for name in KIND_NAMES}
+        seen = set()
+        for _, _, term, kind in self.gazetteer.search(body):
+            if term.lower() not in seen:
+                seen.add(term.lower())
+                by_kind[kind].append(term)
+        # Names not in the gazetteer yet are still picked up from this article's capitalization
+        for phrase, previous in capitalized_runs(doc):
+            name, _ = _classify(phrase, previous)
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                by_kind["entity"].append(name)
+
+        return {
+            "entities": [e for kind in KIND_NAMES for e in by_kind[kind]],
+            "people": by_kind["person"],
+            "places": by_kind["place"],
+            "organisations": by_kind["organisation"],
+            "numbers": numbers,
+            "dates": dates,
+            "percentages": percentages,
+        }
+
+# Process-wide extractor shared by the NLP pipeline and ingestion
+extractor = EntityExtractor()
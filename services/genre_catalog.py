@@ -0,0 +1,82 @@
+import asyncio
+
+from pymongo import ReplaceOne
+
+from mongodb import articles_collection, genres_collection
+from services.response_cache import response_cache
+
+# One document per genre: {"_id": genre, "count": <PASS articles>, "labels": {"hi": ..., "ta": ...}}
+DEFAULT_GENRE = "General"
+
+def _labels_update(article):
+    """$set entries for the translated genre labels carried by an article."""
+    labels = {}
+    for lang, trans in (article.get("translations") or {}).items():
+        label = trans.get("genre")
+        if label and trans.get("is_available") is not False:
+            labels[f"labels.{lang}"] = label
+    return labels
+
+async def record_article(article):
+    """Counts a newly inserted article in the catalog. Only published (PASS) articles are counted."""
+    if article.get("processing_status") != "PASS":
+        return
+    genre = article.get("genre") or DEFAULT_GENRE
+    update = {"$inc": {"count": 1}}
+    labels = _labels_update(article)
+    if labels:
+        update["$set"] = labels
+    await genres_collection.update_one({"_id": genre}, update, upsert=True)
+
+async def list_genres(lang="en"):
+    """Returns [{"name", "label", "count"}] for every genre with published articles, sorted by name."""
+    catalog = await genres_collection.find({"count": {"$gt": 0}}).to_list(length=None)
+    return [
+        {"name": g["_id"], "label": g.get("labels", {}).get(lang, g["_id"]), "count": g["count"]}
+        for g in sorted(catalog, key=lambda g: g["_id"])
+        if g["_id"] and isinstance(g["_id"], str)
+    ]
+
+async def published_total(genre=None):
+    """Number of published articles (in one genre), read from the catalog instead of counting articles."""
+    if genre:
+        doc = await genres_collection.find_one({"_id": genre}, {"count": 1})
+        return max(0, doc["count"]) if doc else 0
+    catalog = await genres_collection.find({"count": {"$gt": 0}}, {"count": 1}).to_list(length=None)
+    return sum(g["count"] for g in catalog)
+
+async def rebuild_catalog():
+    """Recomputes the catalog from the articles collection (backfill or repair). Safe to re-run."""
+    # Older articles may lack a genre; store the default so the feed's genre filter finds them
+    await articles_collection.update_many({"genre": {"$in": [None, ""]}}, {"$set": {"genre": DEFAULT_GENRE}})
+    pipeline = [
+        {"$match": {"processing_status": "PASS"}},
+        {"$group": {
+            "_id": {"$ifNull": ["$genre", DEFAULT_GENRE]},
+            "count": {"$sum": 1},
+            "hi": {"$last": "$translations.hi.genre"},
+            "ta": {"$last": "$translations.ta.genre"},
+        }},
+    ]
+    groups = await articles_collection.aggregate(pipeline).to_list(length=None)
+    # Upserts instead of delete + insert, so workers rebuilding at the same time don't collide
+    if groups:
+        await genres_collection.bulk_write([
+            ReplaceOne({"_id": g["_id"]}, {"count": g["count"], "labels": {lang: g[lang] for lang in ("hi", "ta") if g.get(lang)}}, upsert=True)
+            for g in groups
+        ], ordered=False)
+    await genres_collection.delete_many({"_id": {"$nin": [g["_id"] for g in groups]}})
+    response_cache.bump_generation()
+    print(f"Rebuilt genre catalog with {len(groups)} genres")
+    return len(groups)
+
+async def ensure_catalog():
+    """Builds the catalog on startup when it is empty but articles exist (first deploy)."""
+    if await genres_collection.find_one({}, {"_id": 1}) is not None:
+        return
+    if await articles_collection.find_one({"processing_status": "PASS"}, {"_id": 1}) is None:
+        return
+    await rebuild_catalog()
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_catalog())
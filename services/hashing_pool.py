@@ -0,0 +1,10 @@
+import os
+
+from services.bounded_executor import BoundedExecutor
+
+# bcrypt releases the GIL, so a few threads hash in parallel without blocking the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes allowed to wait for a worker; beyond this requests are rejected instead of queued
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+hashing_pool = BoundedExecutor(workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE, name="password-hash")
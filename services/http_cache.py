@@ -0,0 +1,83 @@
+import hashlib
+import json
+from collections import namedtuple
+
+from fastapi import Response
+
+# Authenticated content: browsers may keep it but must revalidate with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+# Suffixes the compression middleware appends to ETags of encoded responses
+ENCODING_ETAG_SUFFIXES = ("-br", "-gzip")
+
+# A response body serialized once, with the strong ETag of exactly those bytes
+EncodedPayload = namedtuple("EncodedPayload", ["body", "etag"])
+
+def encode_payload(payload, etag=None):
+    """Serializes `payload`; without an explicit `etag` the tag is a hash of the body."""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return EncodedPayload(body, etag or f'"{hashlib.sha1(body).hexdigest()[:24]}"')
+
+def generation_etag(generation, *key_parts):
+    """ETag of a response that only changes when the content generation changes."""
+    key = hashlib.sha1(json.dumps(key_parts, default=str).encode("utf-8")).hexdigest()[:12]
+    return f'"g{generation}-{key}"'
+
+def _strip_encoding(tag):
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ENCODING_ETAG_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+def etag_matches(request, etag):
+    """True if the request's If-None-Match already names `etag` (in any content encoding)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_strip_encoding(tag) == etag for tag in header.split(","))
+
+def not_modified(etag):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def json_response(encoded):
+    """Sends pre-serialized JSON as is, skipping FastAPI's response encoding."""
+    return Response(content=encoded.body, media_type="application/json",
+                    headers={"ETag": encoded.etag, "Cache-Control": CACHE_CONTROL})
+
+def _parse_range(header, size):
+    """(start, end) inclusive for a single `bytes=` range, None if absent, or ValueError if unsatisfiable."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    if (start and not start.isdigit()) or (end and not end.isdigit()):
+        return None
+    if start:
+        first, last = int(start), int(end) if end else size - 1
+    elif end:
+        first, last = max(0, size - int(end)), size - 1
+    else:
+        return None
+    if first >= size or first > last:
+        raise ValueError(header)
+    return first, min(last, size - 1)
+
+def bytes_response(request, data, etag, media_type):
+    """Serves an immutable blob with ETag revalidation and single HTTP Range requests."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    try:
+        requested = _parse_range(request.headers.get("range"), len(data))
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+    # A range for an older version (If-Range mismatch) gets the full body
+    if_range = request.headers.get("if-range")
+    if requested is None or (if_range and if_range.strip() != etag):
+        return Response(content=data, media_type=media_type, headers=headers)
+    first, last = requested
+    headers["Content-Range"] = f"bytes {first}-{last}/{len(data)}"
+    return Response(content=data[first:last + 1], status_code=206, media_type=media_type, headers=headers)
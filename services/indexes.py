@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from mongodb import db
+
+# Required indexes per collection. ensure_indexes() creates missing ones and is a no-op
+# for indexes that already exist, so it runs on every startup and as a migration command.
+INDEXES = {
+    "articles": [
+        # Feed pages, counts, keyset cursors, detail cache warm-up and the search index tail
+        IndexModel([("processing_status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+        IndexModel([("processing_status", ASCENDING), ("genre", ASCENDING), ("_id", DESCENDING)], name="status_genre_id"),
+        # Ingestion dedupe: every branch of the $or needs its own index or the whole query scans
+        IndexModel([("original.source_url", ASCENDING)], name="source_url"),
+        IndexModel([("original.headline", ASCENDING)], name="headline"),
+        IndexModel([("simplified_headline", ASCENDING)], name="simplified_headline"),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "metrics": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+        # Rollup/engagement rebuilds replay view and quiz events in time order
+        IndexModel([("action", ASCENDING), ("created_at", ASCENDING)], name="action_created"),
+        # Seeding one user's rollup replays their view and quiz events in time order
+        IndexModel([("user_id", ASCENDING), ("action", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="user_action_created"),
+    ],
+    "genres": [
+        IndexModel([("count", ASCENDING)], name="count"),
+    ],
+    "engagement": [
+        IndexModel([("dimension", ASCENDING), ("granularity", ASCENDING), ("bucket", ASCENDING)], name="dimension_granularity_bucket"),
+    ],
+    "quiz_stats": [
+        IndexModel([("attempts", ASCENDING)], name="attempts"),
+    ],
+}
+
+# (label, collection, filter, sort) of the queries behind main.py, routes_auth.py and the
+# services. check_query_plans() fails if any of them plans a collection scan. Lookups by
+# _id use the built-in _id index.
+HOT_QUERIES = [
+    ("feed page", "articles", {"processing_status": "PASS"}, [("_id", DESCENDING)]),
+    ("feed page by genre", "articles", {"processing_status": "PASS", "genre": "Technology"}, [("_id", DESCENDING)]),
+    ("feed keyset cursor", "articles", {"processing_status": "PASS", "_id": {"$lt": ObjectId("f" * 24)}}, [("_id", DESCENDING)]),
+    ("search index tail", "articles", {"processing_status": "PASS"}, [("_id", ASCENDING)]),
+    ("ingestion dedupe", "articles", {"$or": [
+        {"original.source_url": "https://example.com/a"},
+        {"original.headline": "Headline"},
+        {"simplified_headline": "Headline"},
+    ]}, None),
+    ("register email check", "users", {"email": "user@example.com"}, None),
+    ("register username check", "users", {"username": "user"}, None),
+    ("genre list", "genres", {"count": {"$gt": 0}}, None),
+    ("engagement report", "engagement", {"dimension": "genre", "granularity": "day", "bucket": {"$gte": datetime(2024, 1, 1, tzinfo=timezone.utc)}}, None),
+    ("quiz report", "quiz_stats", {"attempts": {"$gte": 10}}, None),
+    ("article bodies", "article_bodies", {"_id": {"$in": [ObjectId("0" * 24), ObjectId("f" * 24)]}}, None),
+    ("answer key", "articles", {"_id": ObjectId("0" * 24)}, None),
+    ("user rollup", "user_stats", {"_id": "user"}, None),
+    ("user rollup sink", "user_stats", {"_id": {"$in": ["user", "other"]}, "seeded": True}, None),
+    ("user distinct read", "user_reads", {"_id": "user:article"}, None),
+    ("user rollup seed", "metrics", {"user_id": "user", "action": {"$in": ["view", "quiz"]}},
+     [("created_at", ASCENDING), ("_id", ASCENDING)]),
+]
+
+async def ensure_indexes():
+    """Creates every index of the registry that is missing. Returns the number of collections failed."""
+    failed = 0
+    for name, models in INDEXES.items():
+        try:
+            created = await db.get_collection(name).create_indexes(models)
+            print(f"Indexes ensured on {name}: {', '.join(created)}")
+        except Exception as e:
+            # e.g. duplicate emails in old data block a unique index; keep the other collections going
+            failed += 1
+            print(f"Failed to ensure indexes on {name}: {e}")
+    return failed
+
+def plan_stages(plan):
+    """Every stage name in an explain() plan tree (classic and slot-based engine layouts)."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+async def check_query_plans():
+    """Runs explain() on every hot query. Returns the labels of those whose winning plan is a COLLSCAN."""
+    scans = []
+    for label, name, query, sort in HOT_QUERIES:
+        cursor = db.get_collection(name).find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = set(plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {})))
+        ok = "COLLSCAN" not in stages
+        print(f"{'OK  ' if ok else 'SCAN'} {label}: {name} -> {', '.join(sorted(stages)) or 'no plan'}")
+        if not ok:
+            scans.append(label)
+    return scans
+
+async def migrate(check=False):
+    failed = await ensure_indexes()
+    scans = await check_query_plans() if check else []
+    if scans:
+        print(f"Collection scans in {len(scans)} hot queries: {', '.join(scans)}")
+    return failed == 0 and not scans
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the required MongoDB indexes")
+    parser.add_argument("--check", action="store_true", help="Also explain() the hot queries and fail on collection scans")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(migrate(args.check)) else 1)
@@ -3,6 +3,10 @@ import random
 import feedparser
 from bs4 import BeautifulSoup
 from services.nlp_engine import run_nlp_pipeline
+from services.entities import extractor as entity_extractor
+from services.search_index import search_index
+from services.article_store import save_article, attach_bodies
+from services.tts import schedule_audio_pregeneration
 from mongodb import articles_collection
 import os
 import uuid
@@ -18,6 +22,31 @@ LIVE_RSS_FEEDS = [
     "https://www.thehindu.com/news/national/feeder/default.rss"
 ]
 
+# Number of recent articles used to seed the entity gazetteer when a worker starts ingesting
+GAZETTEER_WARMUP_ARTICLES = 500
+_gazetteer_warmed = False
+
+def _learn_articles(docs):
+    return sum(entity_extractor.learn(doc.get("original", {}).get("raw_text", "")) for doc in docs)
+
+async def warm_gazetteer():
+    """Seeds the entity gazetteer from past articles once per process; new articles are learned as they arrive."""
+    global _gazetteer_warmed
+    if _gazetteer_warmed:
+        return
+    _gazetteer_warmed = True
+    try:
+        cursor = articles_collection.find(
+            {"processing_status": "PASS"}, {"has_body": 1, "original.raw_text": 1}
+        ).sort("_id", -1).limit(GAZETTEER_WARMUP_ARTICLES)
+        docs = await attach_bodies(await cursor.to_list(length=GAZETTEER_WARMUP_ARTICLES))
+        # Learning hundreds of articles takes seconds of CPU; keep it off the event loop
+        # (the gazetteer locks its own updates)
+        learned = await asyncio.to_thread(_learn_articles, docs)
+        print(f"Entity gazetteer warmed with {learned} names ({len(entity_extractor.gazetteer)} total)")
+    except Exception as e:
+        print(f"Failed to warm entity gazetteer: {e}")
+
 def clean_html(raw_html):
     """Utility to strip HTML tags from RSS item descriptions - PRESERVE ALL TEXT."""
     if not raw_html:
@@ -322,7 +351,7 @@ async def process_article_logic(article_data, parsed_feed):
             "processing_status": "FAIL",
             "created_at": datetime.now().isoformat()
         }
-        await articles_collection.insert_one(failed_doc)
+        await save_article(failed_doc)
         return {"status": "FAILED", "msg": "Pipeline failed max retries."}
         
     simplified_text_to_save = pipeline_result["simplified_text"]
@@ -453,7 +482,10 @@ async def process_article_logic(article_data, parsed_feed):
         "created_at": datetime.now().isoformat()
     }
     
-    await articles_collection.insert_one(success_doc)
+    await save_article(success_doc)
+    search_index.add_article(success_doc)
+    # Optional, low priority: the article is already visible while its audio is prepared
+    schedule_audio_pregeneration(success_doc)
     return {"status": "SUCCESS", "msg": f"Ingested & Processed: {headline[:30]}..."}
 
 async def ingest_rss_feed():
@@ -468,6 +500,8 @@ async def ingest_rss_feed():
     skipped_existing = 0
     results = []
     
+    await warm_gazetteer()
+    
     feeds_to_try = list(LIVE_RSS_FEEDS)
     random.shuffle(feeds_to_try)
     
@@ -512,7 +546,7 @@ async def ingest_rss_feed():
                     {"original.headline": title},
                     {"simplified_headline": title}
                 ]
-            })
+            }, {"_id": 1})
             if existing:
                 skipped_existing += 1
                 continue
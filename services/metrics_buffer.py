@@ -0,0 +1,152 @@
+import asyncio
+import os
+
+from pymongo.errors import BulkWriteError
+
+from mongodb import metrics_collection
+
+# Events are written with one insert_many per batch, whichever limit is reached first
+METRICS_BATCH_SIZE = int(os.getenv("METRICS_BATCH_SIZE", "200"))
+METRICS_FLUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", "2"))
+# Events held in memory at most; beyond this record() waits for the writer (backpressure)
+METRICS_BUFFER_MAX_EVENTS = int(os.getenv("METRICS_BUFFER_MAX_EVENTS", "10000"))
+# Failed inserts are retried this many times, waiting METRICS_RETRY_BACKOFF_SECONDS * 2**n
+METRICS_MAX_RETRIES = int(os.getenv("METRICS_MAX_RETRIES", "3"))
+METRICS_RETRY_BACKOFF_SECONDS = 0.5
+DUPLICATE_KEY_ERROR = 11000
+
+_STOP = object()
+
+class MetricsBuffer:
+    """
+    Write-behind buffer for metric events. Requests enqueue events and return immediately;
+    a background writer flushes them to metrics_collection in batches and then hands each
+    batch to the registered sinks (rollups, counters...). stop() drains everything queued.
+    """
+
+    def __init__(self, collection=metrics_collection, batch_size=METRICS_BATCH_SIZE,
+                 flush_interval=METRICS_FLUSH_INTERVAL_SECONDS, max_events=METRICS_BUFFER_MAX_EVENTS,
+                 max_retries=METRICS_MAX_RETRIES):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue = asyncio.Queue(maxsize=max_events)
+        self._sinks = []
+        self._task = None
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.flushes = 0
+        self.sink_failures = 0
+
+    def add_sink(self, sink):
+        """
+        Registers `async sink(events)`, called with every batch after it has been inserted.
+        A sink that raises is retried with the insert backoff, so it should tolerate a replay.
+        """
+        self._sinks.append(sink)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def record(self, event):
+        """Queues one metric document. Waits only when the buffer is full."""
+        self.start()
+        await self._queue.put(event)
+
+    async def stop(self):
+        """Flushes every queued event and stops the writer (call on shutdown)."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if event is _STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+            await self._flush(batch)
+
+    async def _insert(self, events):
+        """One insert_many attempt. Returns (written events, events worth retrying)."""
+        try:
+            await self.collection.insert_many(events, ordered=False)
+            return events, []
+        except BulkWriteError as e:
+            # Unordered: everything but the reported documents was written. A duplicate key
+            # means an earlier attempt wrote the document after all (insert_many set its _id).
+            rejected = {err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR}
+            if rejected:
+                self.failed += len(rejected)
+                print(f"Dropped {len(rejected)} rejected metric events: {e.details['writeErrors'][0].get('errmsg')}")
+            return [ev for i, ev in enumerate(events) if i not in rejected], []
+        except Exception as e:
+            print(f"Failed to write {len(events)} metric events: {e}")
+            return [], events
+
+    async def _flush(self, batch):
+        """Writes a batch, retrying with backoff, then hands what was written to the sinks."""
+        written, pending = await self._insert(batch)
+        for attempt in range(self.max_retries):
+            if not pending:
+                break
+            self.retries += 1
+            await asyncio.sleep(METRICS_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+            more, pending = await self._insert(pending)
+            written += more
+        if pending:
+            self.failed += len(pending)
+            print(f"Gave up on {len(pending)} metric events after {self.max_retries} retries")
+        if not written:
+            return
+        self.written += len(written)
+        self.flushes += 1
+        for sink in self._sinks:
+            await self._feed(sink, written)
+
+    async def _feed(self, sink, events):
+        """Hands a written batch to one sink, retrying with the same backoff as inserts."""
+        name = getattr(sink, "__name__", sink)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+                await asyncio.sleep(METRICS_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            try:
+                await sink(events)
+                return
+            except Exception as e:
+                print(f"Metrics sink {name} failed: {e}")
+        self.sink_failures += 1
+        print(f"Gave up feeding {len(events)} metric events to {name} after {self.max_retries} retries")
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "sink_failures": self.sink_failures,
+        }
+
+metrics_buffer = MetricsBuffer()
@@ -0,0 +1,31 @@
+import base64
+import binascii
+import hashlib
+import json
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Deepest offset served with `page=`; skip() still walks every skipped index entry, so
+# deeper pages must continue from a `next_cursor`
+MAX_PAGE_OFFSET = 1200
+
+def query_fingerprint(*parts):
+    """Short stable hash of the filter a cursor was issued for, so it can't be replayed on another filter."""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
+def encode_cursor(last_id, fingerprint):
+    """Opaque cursor token pointing just past `last_id` in descending `_id` order."""
+    payload = json.dumps({"id": str(last_id), "f": fingerprint}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(token, fingerprint):
+    """Returns the ObjectId encoded in `token`. Raises ValueError if it is malformed or was issued for another filter."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload.get("f") != fingerprint:
+            raise ValueError("Cursor does not match the current filters")
+        return ObjectId(payload["id"])
+    except (binascii.Error, UnicodeError, json.JSONDecodeError, KeyError, TypeError, AttributeError, InvalidId) as e:
+        raise ValueError(f"Malformed cursor: {e}")
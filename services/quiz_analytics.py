@@ -0,0 +1,155 @@
+import math
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+
+from mongodb import quiz_stats_collection
+from services.answer_keys import answer_key_cache
+
+# Questions need this many attempts before the report ranks them
+MIN_REPORT_ATTEMPTS = 10
+# Thresholds for flagging a question in the report
+TOO_HARD_CORRECT_RATE = 0.2
+TOO_EASY_CORRECT_RATE = 0.95
+UNANSWERED = "none"
+
+async def apply_events(events):
+    """
+    Folds the per-question outcomes of quiz submissions into one counter document per
+    (article, question). Registered as a metrics buffer sink.
+
+    Besides attempts and per-answer selection counts, each document keeps running sums of
+    the submission's rest score (the percentage correct on the *other* questions), which is
+    all the report needs to compute the item/rest-score correlation incrementally.
+    """
+    increments = {}
+    for e in events:
+        results = e.get("question_results") if e.get("action") == "quiz" else None
+        if not results:
+            continue
+        total_correct = sum(1 for r in results if r["correct"])
+        others = len(results) - 1
+        for r in results:
+            x = 1 if r["correct"] else 0
+            rest = (total_correct - x) / others * 100 if others else 0.0
+            key = (e["article_id"], r["quiz_id"])
+            inc = increments.setdefault(key, {})
+            for name, value in (
+                ("attempts", 1),
+                ("correct", x),
+                (f"answer_counts.{r['answer_id'] or UNANSWERED}", 1),
+                ("rest_sum", rest),
+                ("rest_sq_sum", rest * rest),
+                ("rest_correct_sum", rest * x),
+            ):
+                inc[name] = inc.get(name, 0) + value
+    if not increments:
+        return
+
+    ops = []
+    for (article_id, quiz_id), inc in increments.items():
+        # Question text and source (LLM or fallback generator), set when the document is created
+        fields = {"article_id": article_id, "quiz_id": quiz_id}
+        try:
+            answer_key = await answer_key_cache.get(ObjectId(article_id)) or []
+        except InvalidId:
+            answer_key = []
+        entry = next((k for k in answer_key if k["quiz_id"] == quiz_id), None)
+        if entry:
+            fields.update({
+                "question": entry.get("question"),
+                "type": entry.get("type"),
+                "correct_answer_id": entry["answer_id"],
+                "choices": entry.get("choices", []),
+            })
+        ops.append(UpdateOne({"_id": f"{article_id}:{quiz_id}"}, {"$inc": inc, "$setOnInsert": fields}, upsert=True))
+    await quiz_stats_collection.bulk_write(ops, ordered=False)
+
+def discrimination(stats):
+    """Point-biserial correlation between answering this question correctly and the rest score, or None."""
+    n = stats.get("attempts", 0)
+    correct = stats.get("correct", 0)
+    if n < 2 or correct in (0, n):
+        return None
+    mean_rest = stats["rest_sum"] / n
+    variance = stats["rest_sq_sum"] / n - mean_rest * mean_rest
+    if variance <= 1e-9:
+        return None
+    p = correct / n
+    mean_rest_correct = stats["rest_correct_sum"] / correct
+    return (mean_rest_correct - mean_rest) / math.sqrt(variance) * math.sqrt(p / (1 - p))
+
+def describe(stats):
+    attempts = stats.get("attempts", 0)
+    correct_rate = stats.get("correct", 0) / attempts if attempts else 0.0
+    r = discrimination(stats)
+    counts = stats.get("answer_counts", {})
+    choice_text = dict(stats.get("choices") or [])
+    correct_id = stats.get("correct_answer_id")
+    distractors = sorted(
+        ({"answer_id": a, "text": choice_text.get(a), "picked": c} for a, c in counts.items() if a not in (correct_id, UNANSWERED)),
+        key=lambda d: -d["picked"],
+    )
+
+    flags = []
+    if correct_rate < TOO_HARD_CORRECT_RATE:
+        flags.append("too_hard")
+    if correct_rate > TOO_EASY_CORRECT_RATE:
+        flags.append("too_easy")
+    if r is not None and r < 0:
+        flags.append("negative_discrimination")
+    if distractors and correct_id and distractors[0]["picked"] > counts.get(correct_id, 0):
+        flags.append("distractor_beats_answer")
+    return {
+        "article_id": stats.get("article_id"),
+        "quiz_id": stats.get("quiz_id"),
+        "question": stats.get("question"),
+        "type": stats.get("type"),
+        "attempts": attempts,
+        "correct_rate": round(correct_rate, 3),
+        "difficulty": round(1 - correct_rate, 3),
+        "discrimination": round(r, 3) if r is not None else None,
+        "unanswered": counts.get(UNANSWERED, 0),
+        "distractors": distractors,
+        "flags": flags,
+    }
+
+def _discrimination_expr():
+    """discrimination() as an aggregation expression; null where it is undefined."""
+    n, c = "$attempts", "$correct"
+    # Denominators are clamped so no branch divides by zero, whichever way $cond is evaluated
+    safe_n, safe_c, safe_wrong = {"$max": [n, 1]}, {"$max": [c, 1]}, {"$max": [{"$subtract": [n, c]}, 1]}
+    mean_rest = {"$divide": ["$rest_sum", safe_n]}
+    variance = {"$subtract": [{"$divide": ["$rest_sq_sum", safe_n]}, {"$multiply": [mean_rest, mean_rest]}]}
+    r = {"$multiply": [
+        {"$divide": [{"$subtract": [{"$divide": ["$rest_correct_sum", safe_c]}, mean_rest]},
+                     {"$sqrt": {"$max": [variance, 1e-9]}}]},
+        {"$sqrt": {"$divide": [c, safe_wrong]}},
+    ]}
+    defined = {"$and": [{"$gte": [n, 2]}, {"$gt": [c, 0]}, {"$lt": [c, n]}, {"$gt": [variance, 1e-9]}]}
+    return {"$cond": [defined, r, None]}
+
+async def question_report(order="difficulty", min_attempts=MIN_REPORT_ATTEMPTS, question_type=None, limit=50):
+    """
+    Questions with at least `min_attempts` attempts, worst first: hardest for
+    order="difficulty", least (or negatively) discriminating for order="discrimination".
+    Ranking and the limit run in MongoDB, so only the returned rows leave the database.
+    """
+    query = {"attempts": {"$gte": min_attempts}}
+    if question_type:
+        query["type"] = question_type
+    if order == "discrimination":
+        stages = [
+            {"$addFields": {"_r": _discrimination_expr()}},
+            # Undefined discrimination ranks last
+            {"$addFields": {"_r_missing": {"$cond": [{"$eq": ["$_r", None]}, 1, 0]}}},
+            {"$sort": {"_r_missing": 1, "_r": 1, "_id": 1}},
+        ]
+    else:
+        stages = [
+            {"$addFields": {"_correct_rate": {"$divide": ["$correct", {"$max": ["$attempts", 1]}]}}},
+            {"$sort": {"_correct_rate": 1, "_id": 1}},
+        ]
+    pipeline = [{"$match": query}, *stages, {"$limit": limit}]
+    return [describe(s) async for s in quiz_stats_collection.aggregate(pipeline)]
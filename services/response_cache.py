@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from services.single_flight import SingleFlight
+
+# File-backed store shared by every gunicorn worker on the host (no external service)
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "ainews_response_cache.sqlite3"))
+# Safety net for changes that bypass save_article (manual edits, scripts)
+RESPONSE_CACHE_MAX_AGE_SECONDS = 600
+# Calls run on the event loop, so a write never waits long for another worker's lock;
+# a busy store counts as a miss (or an unstored result) instead
+RESPONSE_CACHE_BUSY_TIMEOUT_SECONDS = 0.05
+# Expired entries and leases are deleted at most this often, by whichever worker writes
+PRUNE_INTERVAL_SECONDS = 60
+# A worker recomputing a missed entry holds a lease this long; others wait for its result
+LEASE_SECONDS = 10
+LEASE_POLL_SECONDS = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, generation INTEGER NOT NULL, created REAL NOT NULL, payload BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('generation', 0);
+"""
+
+class ResponseCache:
+    """
+    Shared cache of JSON responses invalidated by a content generation counter.
+
+    Every article insert bumps the generation (see `bump_generation`), which makes all
+    cached pages stale at once. Misses are single-flight: concurrent requests in one worker
+    share a future, and across workers a lease row lets only one of them recompute.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH):
+        self.path = path
+        self.owner = uuid.uuid4().hex
+        self._local = threading.local()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self._last_prune = 0.0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=RESPONSE_CACHE_BUSY_TIMEOUT_SECONDS, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def generation(self):
+        return self._conn().execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()[0]
+
+    def version(self):
+        """The current generation for ETags and count keys, or None if the store is unavailable."""
+        try:
+            return self.generation()
+        except sqlite3.Error as e:
+            print(f"Response cache unavailable: {e}")
+            return None
+
+    def bump_generation(self):
+        """
+        Invalidates every cached response; called after each published article insert.
+        Returns the new generation, or None if the store is unavailable (entries then
+        expire after RESPONSE_CACHE_MAX_AGE_SECONDS).
+        """
+        try:
+            conn = self._conn()
+            conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+            generation = self.generation()
+            conn.execute("DELETE FROM entries WHERE generation < ?", (generation,))
+            return generation
+        except sqlite3.Error as e:
+            print(f"Failed to bump response cache generation: {e}")
+            return None
+
+    def _prune(self):
+        """Deletes expired entries and leases, so keys like arbitrary searches can't pile up."""
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        conn = self._conn()
+        conn.execute("DELETE FROM entries WHERE created < ?", (now - RESPONSE_CACHE_MAX_AGE_SECONDS,))
+        conn.execute("DELETE FROM leases WHERE expires < ?", (now,))
+
+    def _read(self, key, generation):
+        row = self._conn().execute(
+            "SELECT payload FROM entries WHERE key = ? AND generation = ? AND created > ?",
+            (key, generation, time.time() - RESPONSE_CACHE_MAX_AGE_SECONDS),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, key, generation, value):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO entries (key, generation, created, payload) VALUES (?, ?, ?, ?)",
+            (key, generation, time.time(), json.dumps(value, separators=(",", ":"))),
+        )
+        self._prune()
+
+    def _acquire_lease(self, key):
+        """Returns True if this worker may recompute `key`. A broken store never blocks recomputation."""
+        try:
+            conn = self._conn()
+            now = time.time()
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires < ?", (key, now))
+            cursor = conn.execute("INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)", (key, self.owner, now + LEASE_SECONDS))
+            return cursor.rowcount == 1
+        except sqlite3.Error:
+            return True
+
+    def _release_lease(self, key):
+        try:
+            self._conn().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+        except sqlite3.Error as e:
+            print(f"Failed to release response cache lease: {e}")
+
+    async def get_or_compute(self, namespace, key_parts, compute, cacheable=lambda value: True):
+        """
+        Returns the cached response for (namespace, key_parts) at the current generation,
+        or awaits compute() once and caches its result if cacheable(result).
+        """
+        key = f"{namespace}:{json.dumps(key_parts, separators=(',', ':'), default=str)}"
+        try:
+            generation = self.generation()
+            cached = self._read(key, generation)
+        except sqlite3.Error as e:
+            print(f"Response cache unavailable: {e}")
+            return await compute()
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        return await self._flights.join(
+            (key, generation), lambda: self._compute_once(key, generation, compute, cacheable)
+        )
+
+    async def _compute_once(self, key, generation, compute, cacheable):
+        lease_key = f"{key}@{generation}"
+        deadline = time.monotonic() + LEASE_SECONDS
+        # Another worker is already recomputing this entry: wait for its result
+        while not self._acquire_lease(lease_key):
+            if time.monotonic() > deadline:
+                break
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+            try:
+                cached = self._read(key, generation)
+            except sqlite3.Error:
+                break
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+        self.misses += 1
+        try:
+            value = await compute()
+            if cacheable(value):
+                try:
+                    self._write(key, generation, value)
+                except sqlite3.Error as e:
+                    print(f"Failed to store cached response: {e}")
+            return value
+        finally:
+            self._release_lease(lease_key)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+response_cache = ResponseCache()
@@ -0,0 +1,228 @@
+import asyncio
+import math
+import re
+import time
+import unicodedata
+from array import array
+from datetime import timedelta
+
+import numpy as np
+from bson import ObjectId
+
+from services.article_store import attach_bodies
+
+SUPPORTED_LANGUAGES = ("en", "hi", "ta")
+
+# Word characters plus the combining vowel signs of Indic scripts (Devanagari .. Sinhala),
+# which Python's \w does not match and which would otherwise split Hindi/Tamil words apart.
+_TOKEN_RE = re.compile(r"[\w\u0900-\u0DFF]+")
+_STOPWORDS = frozenset("""
+a an the and or but of to in on at by for with from as is are was were be been it its this that
+he she they we you his her their has have had will would not no said says also than
+""".split())
+
+# BM25 parameters; headline terms count HEADLINE_WEIGHT times (a simple BM25F field boost)
+BM25_K1 = 1.2
+BM25_B = 0.75
+HEADLINE_WEIGHT = 3
+# Minimum seconds between tail queries for articles ingested by other workers
+SYNC_INTERVAL_SECONDS = 5
+# The tail re-reads this many seconds before the newest `_id` it has seen: another worker's
+# insert can commit after a newer `_id` is already visible. Re-read articles are skipped.
+TAIL_OVERLAP_SECONDS = 120
+
+# Articles read per round trip while tailing the collection
+REFRESH_BATCH_SIZE = 200
+# Only the fields the index needs are read from Mongo (bodies are attached per batch)
+INDEX_PROJECTION = {
+    "has_body": 1,
+    "simplified_headline": 1,
+    "simplified_text": 1,
+    "genre": 1,
+    "translations.hi.headline": 1,
+    "translations.hi.simplified_text": 1,
+    "translations.hi.is_available": 1,
+    "translations.ta.headline": 1,
+    "translations.ta.simplified_text": 1,
+    "translations.ta.is_available": 1,
+}
+
+def tokenize(text):
+    """Unicode-aware tokenizer shared by indexing and querying: NFC + casefold, stopwords dropped."""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFC", text).casefold()
+    return [t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS and t.strip("_")]
+
+def article_fields(article):
+    """Returns {lang: (headline, body)} for every language an article document is readable in."""
+    fields = {"en": (article.get("simplified_headline", ""), article.get("simplified_text", ""))}
+    for lang in ("hi", "ta"):
+        trans = article.get("translations", {}).get(lang)
+        if trans and trans.get("is_available") is not False and trans.get("headline"):
+            fields[lang] = (trans.get("headline", ""), trans.get("simplified_text", ""))
+    return fields
+
+def recency_key(article_id):
+    """(timestamp, rest) of an ObjectId as unsigned ints, in `_id` (insertion time) order."""
+    try:
+        binary = ObjectId(str(article_id)).binary
+    except Exception:
+        return 0, 0
+    return int.from_bytes(binary[:4], "big"), int.from_bytes(binary[4:], "big")
+
+class LanguageIndex:
+    """Append-only inverted index for one language with array-backed postings."""
+    __slots__ = ("postings", "doc_numbers", "doc_lengths", "total_length")
+
+    def __init__(self):
+        # term -> (doc numbers, term frequencies), both growing in doc-number order
+        self.postings = {}
+        self.doc_numbers = array("I")
+        self.doc_lengths = array("I")
+        self.total_length = 0
+
+    def add(self, doc_number, headline, body):
+        counts = {}
+        for token in tokenize(headline):
+            counts[token] = counts.get(token, 0) + HEADLINE_WEIGHT
+        for token in tokenize(body):
+            counts[token] = counts.get(token, 0) + 1
+        if not counts:
+            return
+        position = len(self.doc_numbers)
+        self.doc_numbers.append(doc_number)
+        length = sum(counts.values())
+        self.doc_lengths.append(length)
+        self.total_length += length
+        for token, tf in counts.items():
+            entry = self.postings.get(token)
+            if entry is None:
+                entry = self.postings[token] = (array("I"), array("I"))
+            entry[0].append(position)
+            entry[1].append(tf)
+
+    def score(self, terms):
+        """BM25 scores for every document in this index, as (doc numbers, scores) arrays."""
+        n = len(self.doc_numbers)
+        scores = np.zeros(n, dtype=np.float64)
+        if not n:
+            return np.frombuffer(self.doc_numbers, dtype=np.uint32), scores
+        lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32).astype(np.float64)
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths / (self.total_length / n))
+        for term in set(terms):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            positions = np.frombuffer(entry[0], dtype=np.uint32)
+            tfs = np.frombuffer(entry[1], dtype=np.uint32).astype(np.float64)
+            df = len(positions)
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            scores[positions] += idf * tfs * (BM25_K1 + 1.0) / (tfs + norm[positions])
+        return np.frombuffer(self.doc_numbers, dtype=np.uint32), scores
+
+class SearchIndex:
+    """
+    In-process BM25 search over headline and simplified text for en, hi and ta.
+    Articles are added incrementally: directly by ingestion in this worker, and by a cheap
+    `_id`-ordered tail query (see `refresh`) for articles ingested by other workers. Articles
+    may therefore arrive out of `_id` order; recency comes from the `_id`, not the doc number.
+    """
+
+    def __init__(self):
+        self.languages = {lang: LanguageIndex() for lang in SUPPORTED_LANGUAGES}
+        self.article_ids = []
+        self.genre_codes = array("I")
+        self.id_times = array("I")
+        self.id_rests = array("Q")
+        self._genre_lookup = {}
+        self._numbers = {}
+        self._last_id = None
+        self._last_sync = 0.0
+        self._lock = asyncio.Lock()
+        self._subscribers = []
+
+    def __len__(self):
+        return len(self.article_ids)
+
+    def subscribe(self, callback):
+        """Registers callback(article) to be called for every newly indexed article."""
+        self._subscribers.append(callback)
+
+    def add_article(self, article):
+        """Indexes one PASS article document (must include `_id`). Re-adding an article is a no-op."""
+        article_id = str(article["_id"])
+        if article_id in self._numbers:
+            return
+        doc_number = len(self.article_ids)
+        self._numbers[article_id] = doc_number
+        self.article_ids.append(article_id)
+        genre = article.get("genre") or "General"
+        self.genre_codes.append(self._genre_lookup.setdefault(genre, len(self._genre_lookup)))
+        id_time, id_rest = recency_key(article_id)
+        self.id_times.append(id_time)
+        self.id_rests.append(id_rest)
+        for lang, (headline, body) in article_fields(article).items():
+            self.languages[lang].add(doc_number, headline, body)
+        for callback in self._subscribers:
+            callback(article)
+
+    async def refresh(self, collection, force=False):
+        """
+        Pulls articles newer than the newest `_id` seen by a previous tail, minus an overlap
+        window (the full collection on first call). Only the tail moves that position forward:
+        an article this worker added directly says nothing about other workers' inserts.
+        """
+        if not force and time.monotonic() - self._last_sync < SYNC_INTERVAL_SECONDS:
+            return
+        async with self._lock:
+            if not force and time.monotonic() - self._last_sync < SYNC_INTERVAL_SECONDS:
+                return
+            query = {"processing_status": "PASS"}
+            if isinstance(self._last_id, ObjectId):
+                since = self._last_id.generation_time - timedelta(seconds=TAIL_OVERLAP_SECONDS)
+                query["_id"] = {"$gte": ObjectId.from_datetime(since)}
+            cursor = collection.find(query, INDEX_PROJECTION).sort("_id", 1)
+            while True:
+                batch = await cursor.to_list(length=REFRESH_BATCH_SIZE)
+                if not batch:
+                    break
+                # Articles already indexed are dropped before their bodies are fetched
+                fresh = [a for a in batch if str(a["_id"]) not in self._numbers]
+                if fresh:
+                    for article in await attach_bodies(fresh):
+                        self.add_article(article)
+                if self._last_id is None or batch[-1]["_id"] > self._last_id:
+                    self._last_id = batch[-1]["_id"]
+            self._last_sync = time.monotonic()
+
+    def search(self, query, lang="en", genre=None):
+        """
+        Returns article ids ranked by BM25 score, best first. Non-English searches also
+        match the English index, so English queries work in the Hindi and Tamil feeds.
+        """
+        terms = tokenize(query)
+        if not terms or not self.article_ids:
+            return []
+        scores = np.zeros(len(self.article_ids), dtype=np.float64)
+        langs = [lang] if lang == "en" else [lang, "en"]
+        for code in langs:
+            index = self.languages.get(code)
+            if index is None:
+                continue
+            doc_numbers, lang_scores = index.score(terms)
+            np.maximum.at(scores, doc_numbers, lang_scores)
+
+        if genre and genre != "All":
+            code = self._genre_lookup.get(genre)
+            if code is None:
+                return []
+            scores[np.frombuffer(self.genre_codes, dtype=np.uint32) != code] = 0.0
+        matched = np.flatnonzero(scores > 0)
+        # Highest score first; ties keep the newest `_id` first (~ reverses unsigned order)
+        times = np.frombuffer(self.id_times, dtype=np.uint32)[matched]
+        rests = np.frombuffer(self.id_rests, dtype=np.uint64)[matched]
+        order = matched[np.lexsort((~rests, ~times, -scores[matched]))]
+        return [self.article_ids[i] for i in order]
+
+search_index = SearchIndex()
@@ -0,0 +1,33 @@
+import asyncio
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key into one task. The task is detached
+    from its callers: each caller awaits it through asyncio.shield, so a cancelled caller
+    (e.g. a client that disconnected) never cancels the work other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def in_flight(self, key):
+        return key in self._tasks
+
+    async def join(self, key, compute):
+        """Awaits the running computation for `key`, starting `compute()` if there is none."""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(compute())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Retrieve the exception so a failure nobody awaited any more is not logged as lost
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,130 @@
+import bisect
+import heapq
+from array import array
+from collections import deque
+
+from services.search_index import SUPPORTED_LANGUAGES, article_fields, recency_key, search_index, tokenize
+
+# Prefixes up to this length keep a precomputed list of their newest articles,
+# since they match too many tokens to merge per keystroke
+PRECOMPUTED_PREFIX_LENGTH = 3
+# Newest articles remembered per precomputed prefix
+PREFIX_BUCKET_SIZE = 32
+MAX_SUGGESTIONS = 10
+
+class _LanguageSuggestions:
+    """
+    Sorted headline tokens of one language with their article numbers, newest last.
+    Numbers follow arrival order, which is not always `_id` order (articles from other
+    workers arrive late), so lists are kept sorted by `keys[number]`, the article's recency.
+    """
+    __slots__ = ("keys", "tokens", "postings", "prefix_buckets", "headlines", "headline_tokens")
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.tokens = []
+        self.postings = {}
+        self.prefix_buckets = {}
+        # article number -> headline / set of its tokens, for articles indexed in this language
+        self.headlines = {}
+        self.headline_tokens = {}
+
+    def add(self, number, headline):
+        tokens = set(tokenize(headline))
+        if not tokens:
+            return
+        self.headlines[number] = headline
+        self.headline_tokens[number] = frozenset(tokens)
+        for token in tokens:
+            numbers = self.postings.get(token)
+            if numbers is None:
+                numbers = self.postings[token] = array("I")
+                bisect.insort(self.tokens, token)
+            # Appends in the usual case of a newest article, inserts in place otherwise
+            bisect.insort(numbers, number, key=self.keys.__getitem__)
+            for length in range(1, min(PRECOMPUTED_PREFIX_LENGTH, len(token)) + 1):
+                bucket = self.prefix_buckets.get(token[:length])
+                if bucket is None:
+                    bucket = self.prefix_buckets[token[:length]] = deque(maxlen=PREFIX_BUCKET_SIZE)
+                self._add_to_bucket(bucket, number)
+
+    def _add_to_bucket(self, bucket, number):
+        """Keeps the PREFIX_BUCKET_SIZE newest numbers of a prefix, oldest first."""
+        if number in bucket:
+            return
+        key = self.keys[number]
+        if len(bucket) == bucket.maxlen:
+            if key < self.keys[bucket[0]]:
+                return
+            bucket.popleft()
+        bisect.insort(bucket, number, key=self.keys.__getitem__)
+
+    def candidates(self, prefix, limit):
+        """Article numbers with a headline token starting with `prefix`, newest first."""
+        if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH:
+            return list(reversed(self.prefix_buckets.get(prefix, ())))[:limit]
+        start = bisect.bisect_left(self.tokens, prefix)
+        end = bisect.bisect_left(self.tokens, prefix + "\U0010ffff")
+        # Each posting list is in ascending (oldest first) order, so its tail is its newest
+        tails = (reversed(self.postings[t][-limit:]) for t in self.tokens[start:end])
+        merged = []
+        for number in heapq.merge(*tails, key=self.keys.__getitem__, reverse=True):
+            if not merged or merged[-1] != number:
+                merged.append(number)
+                if len(merged) >= limit:
+                    break
+        return merged
+
+class SuggestIndex:
+    """
+    In-memory prefix index over normalized headline tokens for every supported language.
+    Suggestions are ranked by recency and served without any database round trip; the index
+    is fed by the search index as articles are ingested or picked up from other workers.
+    """
+
+    def __init__(self):
+        # article number -> recency key, shared with every language
+        self.keys = []
+        self.languages = {lang: _LanguageSuggestions(self.keys) for lang in SUPPORTED_LANGUAGES}
+        self.article_ids = []
+
+    def add_article(self, article):
+        number = len(self.article_ids)
+        self.article_ids.append(str(article["_id"]))
+        self.keys.append(recency_key(article["_id"]))
+        for lang, (headline, _) in article_fields(article).items():
+            self.languages[lang].add(number, headline)
+
+    def suggest(self, query, lang="en", limit=MAX_SUGGESTIONS):
+        """
+        Returns [{"id", "headline"}] for headlines containing every complete word of `query`
+        and a word starting with its last (partial) word, newest first.
+        """
+        index = self.languages.get(lang) or self.languages["en"]
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # A trailing space means the last word is complete too
+        prefix = terms[-1] if not query[-1:].isspace() else ""
+        complete = frozenset(terms[:-1] if prefix else terms)
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+
+        if not complete:
+            pool = index.candidates(prefix, limit)
+        else:
+            # Every posting of the rarest complete word, newest first; the other words and
+            # the prefix are checked per hit, so no match is cut off by a fixed window
+            rarest = min(complete, key=lambda t: len(index.postings.get(t, ())))
+            pool = reversed(index.postings.get(rarest, array("I")))
+
+        suggestions = []
+        for number in pool:
+            tokens = index.headline_tokens[number]
+            if complete <= tokens and (not prefix or any(t.startswith(prefix) for t in tokens)):
+                suggestions.append({"id": self.article_ids[number], "headline": index.headlines[number]})
+                if len(suggestions) >= limit:
+                    break
+        return suggestions
+
+suggest_index = SuggestIndex()
+search_index.subscribe(suggest_index.add_article)
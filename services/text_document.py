@@ -0,0 +1,145 @@
+import re
+from array import array
+from functools import lru_cache
+
+# Sentence terminators followed by optional closing quotes/brackets, then whitespace or end of text.
+# "4.5%" or "U.S.-based" never match because the terminator must be followed by whitespace.
+_SENTENCE_END_RE = re.compile(r"[.!?]+[\"')\]]*(?=\s|$)")
+# Unicode-aware words; keeps "don't", "4,500" and "3.5" as single tokens
+_WORD_RE = re.compile(r"[^\W_]+(?:['’.,][^\W_]+)*")
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+# Tokens that end in "." without ending the sentence
+_ABBREVIATIONS = frozenset([
+    "mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "gen", "gov", "sen", "rep", "lt", "col",
+    "no", "vs", "etc", "inc", "ltd", "co", "corp", "jan", "feb", "mar", "apr", "aug", "sept",
+    "oct", "nov", "dec", "u.s", "u.k", "e.g", "i.e",
+])
+
+@lru_cache(maxsize=65536)
+def count_syllables(word):
+    """
+    Heuristic English syllable counter (vowel groups with silent-e and -ed/-es corrections).
+    Memoized, since news vocabulary repeats heavily across articles.
+    """
+    word = word.lower().strip("'")
+    if not word:
+        return 0
+    if len(word) <= 3:
+        return 1
+    if word.endswith("'s"):
+        word = word[:-2]
+    count = len(_VOWEL_GROUP_RE.findall(word))
+    # Silent final "e" (make), but keep consonant + "le" (table) and "ee" (agree)
+    if word.endswith("e") and not word.endswith(("le", "ee", "ye")):
+        count -= 1
+    if word.endswith(("ed", "es")) and not word.endswith(("ted", "ded", "ses", "zes", "ces", "ges", "xes")):
+        count -= 1
+    return max(1, count)
+
+def _sentence_spans(text):
+    """Yields (start, end) spans of sentences, end including the terminator."""
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        end = match.end()
+        if text[match.start()] == ".":
+            preceding = text[start:match.start()].rsplit(None, 1)
+            last_token = preceding[-1].lower() if preceding else ""
+            # Abbreviations and single initials ("J. K. Rowling") do not end a sentence
+            if last_token in _ABBREVIATIONS or (len(last_token) == 1 and last_token.isalpha()):
+                continue
+        yield start, end
+        start = end
+    if text[start:].strip():
+        yield start, len(text)
+
+class TokenizedDocument:
+    """
+    Tokenized view of one article text, built once and shared by every NLP stage.
+    Sentence and word boundaries are stored as offsets into `text` in compact arrays;
+    strings and counts are only materialized on first use.
+    """
+    __slots__ = (
+        "text",
+        "_sentence_starts", "_sentence_ends",
+        "_word_starts", "_word_ends",
+        "_sentence_first_word",
+        "_sentences", "_words", "_syllable_count",
+    )
+
+    def __init__(self, text):
+        self.text = text or ""
+        self._sentence_starts = array("I")
+        self._sentence_ends = array("I")
+        self._word_starts = array("I")
+        self._word_ends = array("I")
+        # CSR-style index: words of sentence i are [first_word[i], first_word[i + 1])
+        self._sentence_first_word = array("I", [0])
+        self._sentences = None
+        self._words = None
+        self._syllable_count = None
+
+        for start, end in _sentence_spans(self.text):
+            segment = self.text[start:end]
+            stripped = segment.strip()
+            if not stripped:
+                continue
+            lead = len(segment) - len(segment.lstrip())
+            self._sentence_starts.append(start + lead)
+            self._sentence_ends.append(start + lead + len(stripped))
+            for match in _WORD_RE.finditer(self.text, start, end):
+                self._word_starts.append(match.start())
+                self._word_ends.append(match.end())
+            self._sentence_first_word.append(len(self._word_starts))
+
+    @classmethod
+    def of(cls, text_or_doc):
+        """Returns `text_or_doc` unchanged if it is already tokenized, else tokenizes it."""
+        if isinstance(text_or_doc, cls):
+            return text_or_doc
+        return cls(text_or_doc)
+
+    @property
+    def sentence_count(self):
+        return len(self._sentence_starts)
+
+    @property
+    def word_count(self):
+        return len(self._word_starts)
+
+    @property
+    def syllable_count(self):
+        if self._syllable_count is None:
+            self._syllable_count = sum(count_syllables(w) for w in self.words)
+        return self._syllable_count
+
+    @property
+    def sentences(self):
+        """All sentences, including their terminal punctuation."""
+        if self._sentences is None:
+            self._sentences = [self.text[s:e] for s, e in zip(self._sentence_starts, self._sentence_ends)]
+        return self._sentences
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = [self.text[s:e] for s, e in zip(self._word_starts, self._word_ends)]
+        return self._words
+
+    def sentence(self, index):
+        return self.sentences[index]
+
+    def sentence_span(self, index):
+        return self._sentence_starts[index], self._sentence_ends[index]
+
+    def sentence_word_count(self, index):
+        return self._sentence_first_word[index + 1] - self._sentence_first_word[index]
+
+    def sentence_words(self, index):
+        return self.words[self._sentence_first_word[index]:self._sentence_first_word[index + 1]]
+
+    def __len__(self):
+        return len(self.text)
+
+    def __repr__(self):
+        return f"<TokenizedDocument sentences={self.sentence_count} words={self.word_count}>"
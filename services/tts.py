@@ -0,0 +1,367 @@
+import asyncio
+from collections import deque
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import unicodedata
+import uuid
+
+from services.bounded_executor import BoundedExecutor, PoolSaturated
+from services.single_flight import SingleFlight
+
+# Content-addressed MP3 files shared by every worker on the host
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ainews_tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Eviction trims the cache to this fraction of the bound so it doesn't rescan on every write
+TTS_CACHE_EVICT_TO = 0.9
+# Reads refresh a file's mtime (its LRU position) at most this often
+TOUCH_INTERVAL_SECONDS = 60
+
+# "gtts" for real audio, "stub" for the offline test synthesizer
+TTS_SYNTHESIZER = os.getenv("TTS_SYNTHESIZER", "gtts")
+TTS_STUB_DELAY_SECONDS = float(os.getenv("TTS_STUB_DELAY_SECONDS", "0"))
+# Sentences of one article stream synthesized at the same time (and buffered ahead of the client)
+TTS_STREAM_CONCURRENCY = int(os.getenv("TTS_STREAM_CONCURRENCY", "3"))
+# Dedicated synthesis threads and how many syntheses may wait for one
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+TTS_MAX_QUEUE = int(os.getenv("TTS_MAX_QUEUE", "64"))
+# Per-user snippet synthesis budget: burst size and refill rate (syntheses per second)
+TTS_USER_BURST = int(os.getenv("TTS_USER_BURST", "30"))
+TTS_USER_RATE = float(os.getenv("TTS_USER_RATE", "1"))
+
+# Optional ingestion stage: pre-synthesize new articles in these languages (off by default)
+TTS_PREGENERATE = os.getenv("TTS_PREGENERATE", "").lower() in ("1", "true", "yes")
+TTS_PREGENERATE_LANGS = [l.strip() for l in os.getenv("TTS_PREGENERATE_LANGS", "en,hi,ta").split(",") if l.strip()]
+# Pre-generation only synthesizes while no reader's synthesis is running; it defers an
+# article after waiting this long for the pool to go idle, and retries it later
+PREGENERATE_IDLE_POLL_SECONDS = 0.5
+PREGENERATE_MAX_WAIT_SECONDS = 300
+PREGENERATE_RETRY_DELAY_SECONDS = 600
+PREGENERATE_MAX_ATTEMPTS = 3
+
+# Everything besides text and language that changes the synthesized audio
+VOICE_SETTINGS = {"engine": TTS_SYNTHESIZER, "slow": False, "tld": "com"}
+# Whole-article audio is the concatenation of its sentence segments
+ARTICLE_VOICE_SETTINGS = {**VOICE_SETTINGS, "segmented": True}
+
+# Matches the frontend's sentence split: runs of text ending in . ! ? । ॥ or a newline
+SENTENCE_RE = re.compile(r"[^.!?\u0964\u0965\n]+[.!?\u0964\u0965\n]+")
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz, 417 bytes, ~26 ms)
+SILENT_MP3_FRAME = b"\xff\xfb\x90\x00" + bytes(413)
+
+def normalize_text(text):
+    """Canonical form used for cache keys: NFC with whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def audio_key(text, lang, voice=VOICE_SETTINGS):
+    payload = json.dumps([normalize_text(text), lang.lower(), voice], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def audio_etag(key):
+    return f'"{key[:32]}"'
+
+def split_sentences(text):
+    """
+    Sentence chunks in the same shape ArticleDetail.jsx requests as snippets, so article
+    streams and per-sentence playback share cache entries. Unterminated trailing text is kept.
+    """
+    sentences = [s.strip() for s in SENTENCE_RE.findall(text)]
+    tail = SENTENCE_RE.sub("", text).strip()
+    if tail:
+        sentences.append(tail)
+    return [s for s in sentences if len(s) > 1]
+
+def stub_synthesize(text, lang):
+    """Offline synthesizer for tests: silent MP3 frames, about a quarter second per word."""
+    if TTS_STUB_DELAY_SECONDS:
+        time.sleep(TTS_STUB_DELAY_SECONDS)
+    return SILENT_MP3_FRAME * max(1, 10 * len(text.split()))
+
+def synthesize(text, lang):
+    """Blocking synthesis call returning MP3 bytes."""
+    if TTS_SYNTHESIZER == "stub":
+        return stub_synthesize(text, lang)
+    from gtts import gTTS
+    tts = gTTS(text=text, lang=lang.lower(), slow=VOICE_SETTINGS["slow"], tld=VOICE_SETTINGS["tld"])
+    fp_buffer = io.BytesIO()
+    tts.write_to_fp(fp_buffer)
+    return fp_buffer.getvalue()
+
+class AudioCache:
+    """
+    Disk cache of synthesized audio keyed by audio_key(). Files are written atomically, so
+    workers can share the directory; the least recently used files are evicted once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Bytes written by this worker since the last scan; triggers the next eviction check
+        self._written_since_scan = 0
+        self._approx_bytes = None
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def get(self, key):
+        """Returns the cached audio bytes or None."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            if time.time() - os.path.getmtime(path) > TOUCH_INTERVAL_SECONDS:
+                os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._written_since_scan += len(data)
+        if self._approx_bytes is None or self._approx_bytes + self._written_since_scan > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Deletes least recently used files until the directory fits the size bound."""
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".mp3"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total > self.max_bytes:
+            target = self.max_bytes * TTS_CACHE_EVICT_TO
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+        self._approx_bytes = total
+        self._written_since_scan = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+audio_cache = AudioCache()
+
+class BudgetExceeded(Exception):
+    """Raised when a user has used up their synthesis budget; retry_after is in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Synthesis budget exhausted, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+class TokenBuckets:
+    """Per-user token buckets: `capacity` syntheses in a burst, refilled at `rate` per second."""
+
+    def __init__(self, capacity=TTS_USER_BURST, rate=TTS_USER_RATE, max_users=10000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_users = max_users
+        self._buckets = {}
+
+    def consume(self, user_id, cost=1.0):
+        """Takes `cost` tokens from the user's bucket or raises BudgetExceeded."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(user_id, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens < cost:
+            self._buckets[user_id] = (tokens, now)
+            raise BudgetExceeded((cost - tokens) / self.rate)
+        if user_id not in self._buckets and len(self._buckets) >= self.max_users:
+            # Forget full buckets first; they behave exactly like a new user
+            self._buckets = {u: b for u, b in self._buckets.items()
+                             if b[0] + (now - b[1]) * self.rate < self.capacity}
+        self._buckets[user_id] = (tokens - cost, now)
+
+    def refund(self, user_id, cost=1.0):
+        """Gives back tokens taken for work that never ran."""
+        if user_id in self._buckets:
+            tokens, updated = self._buckets[user_id]
+            self._buckets[user_id] = (min(self.capacity, tokens + cost), updated)
+
+# Synthesis gets its own threads so snippet storms can't starve asyncio.to_thread users
+# such as ingestion translation
+synthesis_pool = BoundedExecutor(workers=TTS_WORKERS, max_queue=TTS_MAX_QUEUE, name="tts")
+user_budgets = TokenBuckets()
+_flights = SingleFlight()
+
+async def get_audio(text, lang, user_id=None):
+    """
+    Returns (mp3 bytes, key) for text, synthesizing and caching it on a miss. Concurrent
+    misses for the same text and language share one synthesis. When `user_id` is given,
+    a synthesis (not a cache hit or a shared one) is charged to that user's budget.
+    Raises BudgetExceeded, or PoolSaturated when the synthesis pool is full (the charge
+    is refunded then).
+    """
+    key = audio_key(text, lang)
+    data = await asyncio.to_thread(audio_cache.get, key)
+    if data is not None:
+        return data, key
+
+    charged = user_id is not None and not _flights.in_flight(key)
+    if charged:
+        user_budgets.consume(user_id)
+
+    async def synthesize_and_store():
+        data = await synthesis_pool.run(synthesize, normalize_text(text), lang)
+        await asyncio.to_thread(audio_cache.put, key, data)
+        return data
+
+    try:
+        return await _flights.join(key, synthesize_and_store), key
+    except PoolSaturated:
+        if charged:
+            user_budgets.refund(user_id)
+        raise
+
+def article_audio_key(text, lang):
+    return audio_key(text, lang, ARTICLE_VOICE_SETTINGS)
+
+async def stream_audio(text, lang, concurrency=TTS_STREAM_CONCURRENCY):
+    """
+    Yields the MP3 segments of `text` sentence by sentence, in order, as soon as each is
+    ready. Up to `concurrency` sentences are synthesized ahead of the one being sent, and
+    sentences already in the audio cache are read from disk. Once every segment succeeded,
+    the whole article is cached so the next play is a single file read.
+    """
+    sentences = iter(split_sentences(text))
+    pending = deque()
+    segments = []
+    complete = True
+
+    def fill():
+        while len(pending) < concurrency:
+            sentence = next(sentences, None)
+            if sentence is None:
+                return
+            pending.append(asyncio.create_task(get_audio(sentence, lang)))
+
+    fill()
+    try:
+        while pending:
+            task = pending.popleft()
+            fill()
+            try:
+                data, _ = await task
+            except Exception as e:
+                # Skip the sentence rather than cutting the stream off mid-article
+                print(f"TTS segment error: {e}")
+                complete = False
+                continue
+            segments.append(data)
+            yield data
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if complete and segments:
+        await asyncio.to_thread(audio_cache.put, article_audio_key(text, lang), b"".join(segments))
+
+def article_texts(article, languages=None):
+    """{lang: simplified text} for every enabled language the article is available in."""
+    texts = {}
+    for lang in languages or TTS_PREGENERATE_LANGS:
+        if lang == "en":
+            text = article.get("simplified_text")
+        else:
+            trans = (article.get("translations") or {}).get(lang) or {}
+            text = trans.get("simplified_text") if trans.get("is_available") is not False else None
+        if text:
+            texts[lang] = text
+    return texts
+
+async def _wait_for_idle_pool():
+    waited = 0.0
+    while synthesis_pool.in_flight > 0:
+        if waited >= PREGENERATE_MAX_WAIT_SECONDS:
+            raise TimeoutError("synthesis pool never went idle")
+        await asyncio.sleep(PREGENERATE_IDLE_POLL_SECONDS)
+        waited += PREGENERATE_IDLE_POLL_SECONDS
+
+async def pregenerate_article_audio(article, languages=None):
+    """
+    Synthesizes the sentence snippets and the whole-article audio of a new article into the
+    audio cache, one sentence at a time and only while readers aren't waiting on synthesis.
+    Returns False if the pool stayed busy for PREGENERATE_MAX_WAIT_SECONDS; sentences done
+    by then are cached, so a retry picks up where this attempt stopped.
+    """
+    started = time.perf_counter()
+    headline = article.get("simplified_headline", "")[:30]
+    for lang, text in article_texts(article, languages).items():
+        if await asyncio.to_thread(os.path.exists, audio_cache.path(article_audio_key(text, lang))):
+            continue
+        segments = []
+        try:
+            for sentence in split_sentences(text):
+                await _wait_for_idle_pool()
+                data, _ = await get_audio(sentence, lang)
+                segments.append(data)
+        except TimeoutError:
+            print(f"Audio pre-generation deferred for '{headline}': synthesis pool busy for {PREGENERATE_MAX_WAIT_SECONDS}s")
+            return False
+        except Exception as e:
+            print(f"Audio pre-generation stopped for {lang}: {e}")
+            continue
+        if segments:
+            await asyncio.to_thread(audio_cache.put, article_audio_key(text, lang), b"".join(segments))
+    print(f"Pre-generated audio for '{headline}' in {time.perf_counter() - started:.1f}s")
+    return True
+
+pregeneration_counts = {"completed": 0, "retried": 0, "skipped": 0}
+
+async def _pregenerate_with_retries(article):
+    for attempt in range(PREGENERATE_MAX_ATTEMPTS):
+        if attempt:
+            pregeneration_counts["retried"] += 1
+            await asyncio.sleep(PREGENERATE_RETRY_DELAY_SECONDS)
+        if await pregenerate_article_audio(article):
+            pregeneration_counts["completed"] += 1
+            return True
+    pregeneration_counts["skipped"] += 1
+    print(f"Skipped audio pre-generation for '{article.get('simplified_headline', '')[:30]}' "
+          f"after {PREGENERATE_MAX_ATTEMPTS} attempts; it is synthesized on first play")
+    return False
+
+def pregeneration_stats():
+    return {**pregeneration_counts, "pending": len(_background_tasks)}
+
+_background_tasks = set()
+
+def schedule_audio_pregeneration(article):
+    """Starts pre-generation in the background when TTS_PREGENERATE is enabled; never blocks ingestion."""
+    if not TTS_PREGENERATE:
+        return None
+    task = asyncio.get_running_loop().create_task(_pregenerate_with_retries(article))
+    # Keep a reference until it finishes so the task isn't garbage collected mid-run
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
@@ -0,0 +1,197 @@
+import asyncio
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from mongodb import articles_collection, metrics_collection, user_stats_collection, user_reads_collection
+from services.article_store import TRANSLATION_LANGUAGES
+
+# Recent events kept per user; the dashboard shows the newest 5 distinct reads and 5 quizzes
+READING_RING_SIZE = 20
+QUIZ_RING_SIZE = 5
+HISTORY_LENGTH = 5
+
+async def _article_facts(article_ids):
+    """{article_id: (headlines by language, readability score)} for the ids in one query."""
+    object_ids = []
+    for aid in set(article_ids):
+        try:
+            object_ids.append(ObjectId(aid))
+        except (InvalidId, TypeError):
+            continue
+    projection = {"simplified_headline": 1, "readability_score": 1}
+    for lang in TRANSLATION_LANGUAGES:
+        projection[f"translations.{lang}.headline"] = 1
+    facts = {}
+    async for a in articles_collection.find({"_id": {"$in": object_ids}}, projection):
+        headlines = {"en": a.get("simplified_headline", "Unknown Article")}
+        for lang, trans in (a.get("translations") or {}).items():
+            if trans.get("headline"):
+                headlines[lang] = trans["headline"]
+        facts[str(a["_id"])] = (headlines, a.get("readability_score", 0))
+    return facts
+
+async def apply_events(events):
+    """
+    Folds a batch of view/quiz metric events into the per-user rollups. Registered as a
+    metrics buffer sink, so it runs once per flushed batch, after the insert. Only seeded
+    rollups are updated: a user without one gets it built from the metrics collection on
+    first read, which already includes these events. A rollup seeded between the insert
+    and this call has replayed some of them too; its watermark (the newest metric _id it
+    replayed) tells which, so they aren't counted twice.
+    """
+    events = [e for e in events if e.get("user_id") and e.get("article_id") and e.get("action") in ("view", "quiz")]
+    if not events:
+        return
+    watermarks = {}
+    async for r in user_stats_collection.find({"_id": {"$in": list({e["user_id"] for e in events})}, "seeded": True},
+                                              {"watermark": 1}):
+        watermarks[r["_id"]] = r.get("watermark")
+    # _ids are assigned by insert_many in batch order, so they grow with every flush of a worker
+    events = [e for e in events if e["user_id"] in watermarks
+              and (watermarks[e["user_id"]] is None or (e.get("_id") is not None and e["_id"] > watermarks[e["user_id"]]))]
+    if not events:
+        return
+    facts = await _article_facts(e["article_id"] for e in events)
+
+    # Distinct reads: a view counts only when it creates the (user, article) document
+    read_ops, read_keys, new_reads_seen = [], [], set()
+    for e in events:
+        key = (e["user_id"], e["article_id"])
+        if e["action"] == "view" and key not in new_reads_seen:
+            new_reads_seen.add(key)
+            read_keys.append(key)
+            read_ops.append(UpdateOne({"_id": f"{key[0]}:{key[1]}"},
+                                      {"$setOnInsert": {"user_id": key[0], "article_id": key[1], "first_read_at": e.get("created_at")}},
+                                      upsert=True))
+    new_reads = set()
+    if read_ops:
+        result = await user_reads_collection.bulk_write(read_ops, ordered=False)
+        new_reads = {read_keys[i] for i in result.upserted_ids}
+
+    rollups = {}
+    for e in events:
+        r = rollups.setdefault(e["user_id"], {"inc": {}, "reads": [], "quizzes": []})
+        headlines, readability = facts.get(e["article_id"], ({}, 0))
+        entry = {"article_id": e["article_id"], "headlines": headlines, "date": e.get("created_at")}
+        if e["action"] == "view":
+            if headlines:
+                r["reads"].append(entry)
+            if (e["user_id"], e["article_id"]) in new_reads:
+                new_reads.discard((e["user_id"], e["article_id"]))
+                r["inc"]["articles_read"] = r["inc"].get("articles_read", 0) + 1
+                r["inc"]["readability_sum"] = r["inc"].get("readability_sum", 0) + readability
+        else:
+            score = e.get("quiz_score_pct", 0)
+            r["quizzes"].append({**entry, "score": score})
+            r["inc"]["quiz_count"] = r["inc"].get("quiz_count", 0) + 1
+            r["inc"]["quiz_score_sum"] = r["inc"].get("quiz_score_sum", 0) + score
+
+    ops = []
+    for user_id, r in rollups.items():
+        update = {}
+        if r["inc"]:
+            update["$inc"] = r["inc"]
+        push = {}
+        if r["reads"]:
+            push["reading_history"] = {"$each": r["reads"][::-1], "$position": 0, "$slice": READING_RING_SIZE}
+        if r["quizzes"]:
+            push["quiz_history"] = {"$each": r["quizzes"][::-1], "$position": 0, "$slice": QUIZ_RING_SIZE}
+        if push:
+            update["$push"] = push
+        if update:
+            # A rollup reseeded since the watermarks were read has replayed this batch already
+            ops.append(UpdateOne({"_id": user_id, "seeded": True, "watermark": watermarks[user_id]}, update))
+    if ops:
+        await user_stats_collection.bulk_write(ops, ordered=False)
+
+def _headline(entry, lang):
+    return entry.get("headlines", {}).get(lang) or entry.get("headlines", {}).get("en", "Unknown Article")
+
+async def seed_user_stats(user_id):
+    """Builds one user's rollup from their metric events and stores it. Returns the rollup."""
+    events = await metrics_collection.find(
+        {"user_id": user_id, "action": {"$in": ["view", "quiz"]}}
+    ).sort([("created_at", 1), ("_id", 1)]).to_list(length=None)
+    # The sink skips events at or below this _id: they are already counted here
+    watermark = max((e["_id"] for e in events), default=None)
+    events = [e for e in events if e.get("article_id")]
+    facts = await _article_facts(e["article_id"] for e in events)
+
+    rollup = {"seeded": True, "watermark": watermark, "articles_read": 0, "readability_sum": 0, "quiz_count": 0, "quiz_score_sum": 0}
+    reads, quizzes, first_reads = [], [], {}
+    for e in events:
+        headlines, readability = facts.get(e["article_id"], ({}, 0))
+        entry = {"article_id": e["article_id"], "headlines": headlines, "date": e.get("created_at")}
+        if e["action"] == "view":
+            if headlines:
+                reads.append(entry)
+            if e["article_id"] not in first_reads:
+                first_reads[e["article_id"]] = e.get("created_at")
+                rollup["articles_read"] += 1
+                rollup["readability_sum"] += readability
+        else:
+            score = e.get("quiz_score_pct", 0)
+            quizzes.append({**entry, "score": score})
+            rollup["quiz_count"] += 1
+            rollup["quiz_score_sum"] += score
+    rollup["reading_history"] = reads[::-1][:READING_RING_SIZE]
+    rollup["quiz_history"] = quizzes[::-1][:QUIZ_RING_SIZE]
+
+    # Later views of these articles must not count as new distinct reads
+    if first_reads:
+        await user_reads_collection.bulk_write([
+            UpdateOne({"_id": f"{user_id}:{article_id}"},
+                      {"$setOnInsert": {"user_id": user_id, "article_id": article_id, "first_read_at": first_read_at}},
+                      upsert=True)
+            for article_id, first_read_at in first_reads.items()
+        ], ordered=False)
+    try:
+        await user_stats_collection.replace_one({"_id": user_id, "seeded": {"$ne": True}}, rollup, upsert=True)
+    except DuplicateKeyError:
+        # Seeded by a concurrent request; both computed it from the same events
+        pass
+    return rollup
+
+async def load_user_stats(user_id, lang="en"):
+    """Dashboard numbers and recent history for one user, from their rollup document."""
+    rollup = await user_stats_collection.find_one({"_id": user_id})
+    if not rollup or not rollup.get("seeded"):
+        rollup = await seed_user_stats(user_id)
+    quiz_count = rollup.get("quiz_count", 0)
+    articles_read = rollup.get("articles_read", 0)
+
+    reading_history, seen = [], set()
+    for entry in rollup.get("reading_history", []):
+        if entry["article_id"] in seen:
+            continue
+        seen.add(entry["article_id"])
+        reading_history.append({"article_id": entry["article_id"], "headline": _headline(entry, lang), "date": entry.get("date")})
+        if len(reading_history) >= HISTORY_LENGTH:
+            break
+
+    quiz_history = [
+        {"article_id": e["article_id"], "headline": _headline(e, lang), "score": e.get("score", 0), "date": e.get("date")}
+        for e in rollup.get("quiz_history", [])[:HISTORY_LENGTH]
+    ]
+    return {
+        "articles_read": articles_read,
+        "avg_score": round(rollup.get("quiz_score_sum", 0) / quiz_count, 1) if quiz_count else 0,
+        "avg_readability": round(rollup.get("readability_sum", 0) / articles_read, 2) if articles_read else 0,
+        "reading_history": reading_history,
+        "quiz_history": quiz_history,
+    }
+
+async def rebuild_user_stats():
+    """
+    Repair: drops every rollup so each is rebuilt from the metrics collection on its next
+    read. Safe while the server runs, since the live sink skips rollups that aren't seeded.
+    """
+    result = await user_stats_collection.delete_many({})
+    print(f"Reset {result.deleted_count} user rollups; they are rebuilt from metrics on next read")
+    return result.deleted_count
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_user_stats())
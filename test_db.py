@@ -1,10 +1,12 @@
 import asyncio
 from mongodb import articles_collection
+from services.article_store import load_article
 import json
 from bson import json_util
 
 async def test_db():
-    doc = await articles_collection.find_one({}, sort=[("_id", -1)])
+    latest = await articles_collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    doc = await load_article(latest["_id"]) if latest else None
     if doc:
         print(f"Latest Headline: {doc.get('simplified_headline')}")
         trans = doc.get("translations")
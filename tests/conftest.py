@@ -0,0 +1,42 @@
+import os
+import sys
+import tempfile
+
+import mongomock.collection
+import mongomock_motor
+import pytest
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+# Offline configuration, read by the services at import time
+os.environ.setdefault("TTS_SYNTHESIZER", "stub")
+os.environ.setdefault("TTS_CACHE_DIR", tempfile.mkdtemp(prefix="ainews-tts-"))
+os.environ.setdefault("RESPONSE_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="ainews-rc-"), "cache.sqlite3"))
+# Importing main opens the SQLAlchemy database; keep it out of the working tree
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="ainews-db-"), "sql_app.db"))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mongodb
+
+def _without_sort(method):
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return wrapper
+
+# mongomock predates the `sort` argument newer pymongo versions pass to bulk operations
+for _name in ("add_update", "add_replace"):
+    setattr(mongomock.collection.BulkOperationBuilder, _name, _without_sort(getattr(mongomock.collection.BulkOperationBuilder, _name)))
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """A fresh in-memory database swapped in for the collections the project's modules imported."""
+    database = mongomock_motor.AsyncMongoMockClient()[mongodb.db.name]
+    modules = [m for m in list(sys.modules.values()) if (getattr(m, "__file__", None) or "").startswith(ROOT)]
+    for module in modules:
+        for attr, value in list(vars(module).items()):
+            if isinstance(value, AsyncIOMotorCollection):
+                monkeypatch.setattr(module, attr, database.get_collection(value.name))
+            elif isinstance(value, AsyncIOMotorDatabase):
+                monkeypatch.setattr(module, attr, database)
+    return database
@@ -0,0 +1,70 @@
+import asyncio
+
+from bson import ObjectId
+
+from services.answer_keys import AnswerKeyCache, question_results, score_answers
+from services.article_store import build_answer_key
+
+QUIZZES = [
+    {"id": 1, "question_text": "Who won?", "question_type": "ai_generated", "answers": [
+        {"id": 10, "answer_text": "Team A", "is_correct": True},
+        {"id": 11, "answer_text": "Team B", "is_correct": False},
+    ]},
+    {"id": 2, "question_text": "Where?", "question_type": "dynamic", "answers": [
+        {"id": 20, "answer_text": "Chennai", "is_correct": False},
+        {"id": 21, "answer_text": "Delhi", "is_correct": True},
+    ]},
+    # No correct answer marked: never scored
+    {"id": 3, "question_text": "Broken?", "answers": [{"id": 30, "answer_text": "?"}]},
+]
+
+def test_answer_key_marks_unscorable_questions():
+    answer_key = build_answer_key(QUIZZES)
+    assert [(k["quiz_id"], k["answer_id"], k["text"]) for k in answer_key] == [
+        ("1", "10", "Team A"), ("2", "21", "Delhi"), ("3", None, None),
+    ]
+    assert answer_key[1]["question"] == "Where?" and answer_key[1]["type"] == "dynamic"
+    assert answer_key[1]["choices"] == [["20", "Chennai"], ["21", "Delhi"]]
+
+def test_scores_against_the_answer_key():
+    correct, _, answers = score_answers(build_answer_key(QUIZZES), {"1": "10", "2": 20, "3": 30})
+    assert correct == 1
+    assert answers == {"1": {"id": "10", "text": "Team A"}, "2": {"id": "21", "text": "Delhi"}}
+
+def test_all_scorable_questions_right_is_full_marks():
+    correct, total, _ = score_answers(build_answer_key(QUIZZES), {"1": 10, "2": 21})
+    assert correct == total == 2
+
+def test_question_results_record_each_selection():
+    assert question_results(build_answer_key(QUIZZES), {"1": 10, "3": 30}) == [
+        {"quiz_id": "1", "answer_id": "10", "correct": True},
+        {"quiz_id": "2", "answer_id": None, "correct": False},
+    ]
+
+def test_legacy_articles_are_keyed_and_backfilled(mongo):
+    async def scenario():
+        article_id = (await mongo.articles.insert_one({"quizzes": QUIZZES})).inserted_id
+        cache = AnswerKeyCache()
+        answer_key = await cache.get(article_id)
+        stored = await mongo.articles.find_one({"_id": article_id})
+        await mongo.articles.delete_many({})
+        return answer_key, stored, await cache.get(article_id), await AnswerKeyCache().get(ObjectId())
+
+    answer_key, stored, cached, missing = asyncio.run(scenario())
+    assert answer_key == build_answer_key(QUIZZES) == stored["answer_key"] == cached
+    assert missing is None
+
+def test_selections_outside_the_choices_count_as_unanswered():
+    results = question_results(build_answer_key(QUIZZES), {"1": "zz", "2": "a.b"})
+    assert results == [
+        {"quiz_id": "1", "answer_id": None, "correct": False},
+        {"quiz_id": "2", "answer_id": None, "correct": False},
+    ]
+
+def test_keys_stored_without_choices_are_rebuilt(mongo):
+    async def scenario():
+        old_key = [{k: v for k, v in entry.items() if k != "choices"} for entry in build_answer_key(QUIZZES)]
+        article_id = (await mongo.articles.insert_one({"quizzes": QUIZZES, "answer_key": old_key})).inserted_id
+        return await AnswerKeyCache().get(article_id)
+
+    assert asyncio.run(scenario()) == build_answer_key(QUIZZES)
@@ -0,0 +1,70 @@
+import asyncio
+
+from services.article_store import (
+    attach_bodies, build_answer_key, compress_body, decompress_body, list_projection, load_article,
+    merge_body, migrate_embedded_bodies, save_article, split_article,
+)
+
+ARTICLE = {
+    "simplified_headline": "Budget approved",
+    "simplified_text": "The council approved the budget.",
+    "genre": "Politics",
+    "original": {"raw_text": "The city council approved the budget on Monday.", "publisher_name": "BBC"},
+    "quizzes": [{"id": 1, "question_text": "Who approved it?"}],
+    "translations": {"hi": {"headline": "बजट मंज़ूर", "simplified_text": "परिषद ने बजट मंज़ूर किया।", "is_available": True}},
+}
+
+def test_split_moves_heavy_fields_into_the_body():
+    slim, body = split_article(ARTICLE)
+    assert "simplified_text" not in slim and "quizzes" not in slim
+    assert slim["original"] == {"publisher_name": "BBC"}
+    assert slim["translations"] == {"hi": {"headline": "बजट मंज़ूर", "is_available": True}}
+    assert slim["answer_key"] == build_answer_key(ARTICLE["quizzes"])
+    assert body["original"] == {"raw_text": ARTICLE["original"]["raw_text"]}
+    assert body["translations"]["hi"] == {"simplified_text": "परिषद ने बजट मंज़ूर किया।"}
+    # The input is left alone
+    assert ARTICLE["original"]["raw_text"] and ARTICLE["simplified_text"]
+    assert merge_body(slim, decompress_body({"payload": compress_body(body)})) == {**ARTICLE, "answer_key": slim["answer_key"]}
+
+def test_list_projection_fetches_only_the_requested_translation():
+    assert "translations.hi.headline" in list_projection("hi")
+    assert not any(key.startswith("translations") for key in list_projection("en"))
+
+def test_saved_articles_load_whole(mongo):
+    async def scenario():
+        article_id = await save_article(dict(ARTICLE))
+        slim = await mongo.articles.find_one({"_id": article_id})
+        loaded = await load_article(article_id)
+        batch = await attach_bodies(await mongo.articles.find({}).to_list(None))
+        return article_id, slim, loaded, batch
+
+    article_id, slim, loaded, batch = asyncio.run(scenario())
+    assert slim["has_body"] and "simplified_text" not in slim
+    assert loaded == {**ARTICLE, "_id": article_id, "has_body": True, "answer_key": slim["answer_key"]}
+    assert batch == [loaded]
+
+def test_migration_moves_embedded_bodies(mongo):
+    async def scenario():
+        article_id = (await mongo.articles.insert_one(dict(ARTICLE))).inserted_id
+        migrated = await migrate_embedded_bodies()
+        slim = await mongo.articles.find_one({"_id": article_id})
+        again = await migrate_embedded_bodies()
+        return article_id, migrated, slim, await load_article(article_id), again
+
+    article_id, migrated, slim, loaded, again = asyncio.run(scenario())
+    assert (migrated, again) == (1, 0)
+    assert "quizzes" not in slim and slim["answer_key"]
+    assert loaded == {**ARTICLE, "_id": article_id, "has_body": True, "answer_key": slim["answer_key"]}
+
+def test_only_published_articles_invalidate_cached_feeds(mongo):
+    from services.response_cache import response_cache
+
+    async def scenario():
+        before = response_cache.generation()
+        await save_article({**ARTICLE, "processing_status": "FAIL"})
+        after_fail = response_cache.generation()
+        await save_article({**ARTICLE, "processing_status": "PASS"})
+        return before, after_fail, response_cache.generation()
+
+    before, after_fail, after_pass = asyncio.run(scenario())
+    assert after_fail == before and after_pass == before + 1
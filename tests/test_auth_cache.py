@@ -0,0 +1,85 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import auth
+from auth import TTLCache, create_access_token, decode_access_token, get_current_user, invalidate_user, load_principal
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    auth.principal_cache.clear()
+    auth.token_cache.clear()
+
+def test_ttl_cache_expires_and_evicts_least_recent():
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    cache.set("short", 4, ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+def test_decoded_tokens_are_memoized_until_they_expire():
+    token = create_access_token({"sub": "u1"}, timedelta(minutes=5))
+    assert decode_access_token(token)["sub"] == "u1"
+    assert auth.token_cache.get(token)["sub"] == "u1"
+
+def test_principals_are_cached_and_invalidated(mongo):
+    async def scenario():
+        user_id = str((await mongo.users.insert_one({"email": "a@example.com", "username": "asha"})).inserted_id)
+        token = create_access_token({"sub": user_id}, timedelta(minutes=5))
+        first = await get_current_user(token)
+        await mongo.users.update_one({}, {"$set": {"username": "asha2"}})
+        cached = await get_current_user(token)
+        invalidate_user(user_id)
+        fresh = await get_current_user(token)
+        return first, cached, fresh
+
+    first, cached, fresh = asyncio.run(scenario())
+    assert first["username"] == cached["username"] == "asha"
+    assert fresh["username"] == "asha2"
+
+def test_deleted_and_unknown_users_are_rejected(mongo):
+    async def scenario():
+        user_id = str((await mongo.users.insert_one({"email": "a@example.com", "username": "asha"})).inserted_id)
+        await mongo.users.delete_many({})
+        missing = await load_principal(user_id)
+        bad_id = await load_principal("not-an-id")
+        with pytest.raises(HTTPException):
+            await get_current_user(create_access_token({"sub": user_id}))
+        return missing, bad_id
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert len(auth.principal_cache._entries) == 0
+
+def test_changes_made_elsewhere_show_up_after_the_ttl(mongo, monkeypatch):
+    monkeypatch.setattr(auth, "principal_cache", TTLCache(ttl_seconds=0.05, max_entries=10))
+
+    async def scenario():
+        user_id = str((await mongo.users.insert_one({"email": "a@example.com", "username": "asha"})).inserted_id)
+        await load_principal(user_id)
+        await mongo.users.update_one({}, {"$set": {"username": "asha2"}})
+        stale = await load_principal(user_id)
+        await asyncio.sleep(0.06)
+        return stale, await load_principal(user_id)
+
+    stale, fresh = asyncio.run(scenario())
+    assert (stale["username"], fresh["username"]) == ("asha", "asha2")
+
+def test_login_refreshes_the_cached_principal(mongo):
+    from routes_auth import UserLogin, login
+
+    async def scenario():
+        hashed = await auth.get_password_hash_async("secret")
+        user_id = str((await mongo.users.insert_one({"email": "a@example.com", "username": "asha", "hashed_password": hashed})).inserted_id)
+        await load_principal(user_id)
+        await mongo.users.update_one({}, {"$set": {"username": "asha2"}})
+        await login(UserLogin(email="a@example.com", password="secret"))
+        return await load_principal(user_id)
+
+    assert asyncio.run(scenario())["username"] == "asha2"
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import pytest
+
+from services.bounded_executor import BoundedExecutor, PoolSaturated
+
+def test_jobs_past_the_queue_limit_are_rejected():
+    pool = BoundedExecutor(workers=1, max_queue=1, name="test-pool")
+
+    async def scenario():
+        running = [asyncio.create_task(pool.run(time.sleep, 0.1)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        busy = pool.stats()
+        with pytest.raises(PoolSaturated):
+            await pool.run(time.sleep, 0)
+        await asyncio.gather(*running)
+        return busy
+
+    busy = asyncio.run(scenario())
+    assert (busy["in_flight"], busy["queued"]) == (2, 1)
+    stats = pool.stats()
+    assert (stats["in_flight"], stats["completed"], stats["rejected"]) == (0, 2, 1)
+
+def test_a_cancelled_caller_keeps_its_slot_until_the_thread_finishes():
+    pool = BoundedExecutor(workers=1, max_queue=0, name="test-pool")
+
+    async def scenario():
+        caller = asyncio.create_task(pool.run(time.sleep, 0.1))
+        await asyncio.sleep(0.02)
+        caller.cancel()
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturated):
+            await pool.run(time.sleep, 0)
+        await asyncio.sleep(0.15)
+        return await pool.run(lambda: "free again")
+
+    assert asyncio.run(scenario()) == "free again"
+    assert pool.stats()["in_flight"] == 0
@@ -0,0 +1,69 @@
+import asyncio
+
+from services.detail_cache import DetailCache, payload_size
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = DetailCache(max_entries=2, max_bytes=10_000)
+    cache.put(("a", "en"), {"text": "a"})
+    cache.put(("b", "en"), {"text": "b"})
+    cache.get(("a", "en"))
+    cache.put(("c", "en"), {"text": "c"})
+    assert cache.get(("b", "en")) is None and cache.get(("a", "en")) == {"text": "a"}
+
+    big = {"text": "x" * 100}
+    cache = DetailCache(max_entries=100, max_bytes=payload_size(big) * 2)
+    for key in ("a", "b", "c"):
+        cache.put((key, "en"), big)
+    assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+    assert cache.total_bytes == payload_size(big) * 2
+    # Payloads larger than the whole cache are never stored
+    cache.put(("huge", "en"), {"text": "x" * 1000})
+    assert cache.get(("huge", "en")) is None
+
+def test_concurrent_misses_share_one_load():
+    cache = DetailCache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"id": "a"}
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get_or_load(("a", "en"), load) for _ in range(4)))
+        return results, await cache.get_or_load(("a", "en"), load)
+
+    results, cached = asyncio.run(scenario())
+    assert results == [{"id": "a"}] * 4 and cached == {"id": "a"}
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 3, 1)
+
+def test_invalidate_drops_every_language_of_an_article():
+    cache = DetailCache()
+    for lang in ("en", "hi"):
+        cache.put(("a", lang), {"lang": lang})
+    cache.put(("b", "en"), {"lang": "en"})
+    cache.invalidate("a")
+    assert cache.get(("a", "hi")) is None and cache.get(("b", "en")) is not None
+    assert cache.total_bytes == payload_size({"lang": "en"})
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_load():
+    cache = DetailCache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"id": "a"}
+
+    async def scenario():
+        first = asyncio.create_task(cache.get_or_load(("a", "en"), load))
+        await asyncio.sleep(0.02)
+        second = asyncio.create_task(cache.get_or_load(("a", "en"), load))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == {"id": "a"}
+    assert len(calls) == 1 and cache.get(("a", "en")) == {"id": "a"}
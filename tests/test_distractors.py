@@ -0,0 +1,26 @@
+import numpy as np
+
+from services.nlp_engine import rank_distractors, sentence_similarity_matrix
+
+SENTENCES = [
+    ["The", "council", "approved", "the", "school", "budget"],
+    ["The", "council", "approved", "the", "school", "budget", "today"],
+    ["The", "school", "budget", "pays", "for", "new", "teachers"],
+    ["Heavy", "rain", "flooded", "the", "coastal", "roads"],
+]
+
+def test_similarity_is_cosine_of_tf_idf_vectors():
+    similarity = sentence_similarity_matrix(SENTENCES)
+    assert similarity.shape == (4, 4)
+    assert np.allclose(np.diag(similarity), 1.0)
+    assert np.allclose(similarity, similarity.T)
+    # Only stopwords in common
+    assert similarity[0, 3] == 0.0
+    assert similarity[0, 1] > similarity[0, 2] > similarity[0, 3]
+
+def test_distractors_skip_the_answer_and_its_paraphrases():
+    ranked = rank_distractors(sentence_similarity_matrix(SENTENCES))
+    # Sentence 1 nearly repeats sentence 0, so it is no distractor for it (and vice versa)
+    assert ranked[0] == [2, 3]
+    assert ranked[1] == [2, 3]
+    assert all(i not in row for i, row in enumerate(ranked))
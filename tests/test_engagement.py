@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from services.engagement import apply_events, bucket_id, bucket_start, engagement_report, event_time, rebuild_engagement
+
+def test_buckets_and_event_times():
+    ts = datetime(2024, 5, 1, 13, 45, 10, tzinfo=timezone.utc)
+    assert bucket_start(ts, "hour") == datetime(2024, 5, 1, 13, tzinfo=timezone.utc)
+    assert bucket_start(ts, "day") == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert bucket_id("hour", bucket_start(ts, "hour"), "genre", "Sports") == "hour:2024050113:genre:Sports"
+    assert event_time({"ts": ts.replace(tzinfo=None)}) == ts
+    assert event_time({"created_at": "2024-05-01T19:15:10+05:30"}) == ts
+    assert event_time({"created_at": "Now"}) is None
+
+async def record_history(mongo):
+    sports, politics = ObjectId(), ObjectId()
+    await mongo.articles.insert_many([{"_id": sports, "genre": "Sports"}, {"_id": politics, "genre": "Politics"}])
+    now = datetime.now(timezone.utc)
+    old = now - timedelta(days=30)
+    events = [
+        {"action": "view", "article_id": str(sports), "ts": now, "lang": "hi"},
+        {"action": "view", "article_id": str(sports), "ts": now},
+        {"action": "quiz", "article_id": str(sports), "ts": now, "quiz_score_pct": 50},
+        {"action": "quiz", "article_id": str(sports), "ts": now, "quiz_score_pct": 100},
+        {"action": "view", "article_id": str(politics), "ts": now},
+        {"action": "view", "article_id": str(politics), "ts": old},
+        {"action": "login", "ts": now},
+    ]
+    return events
+
+def test_reports_sum_views_and_quiz_scores_per_key(mongo):
+    async def scenario():
+        await apply_events(await record_history(mongo))
+        return (await engagement_report("genre", days=7), await engagement_report("genre", days=None),
+                await engagement_report("lang", days=7))
+
+    week, all_time, langs = asyncio.run(scenario())
+    assert week == [
+        {"key": "Sports", "views": 2, "quizzes": 2, "avg_quiz_score": 75.0},
+        {"key": "Politics", "views": 1, "quizzes": 0, "avg_quiz_score": None},
+    ]
+    # The month-old view only shows up all time
+    assert [(r["key"], r["views"]) for r in all_time] == [("Sports", 2), ("Politics", 2)]
+    assert [(r["key"], r["views"]) for r in langs] == [("en", 2), ("hi", 1)]
+
+def test_rebuild_matches_incremental_counters(mongo):
+    async def scenario():
+        events = await record_history(mongo)
+        await apply_events(events)
+        incremental = await engagement_report("article", days=None)
+        await mongo.metrics.insert_many(events)
+        replayed = await rebuild_engagement()
+        return incremental, replayed, await engagement_report("article", days=None)
+
+    incremental, replayed, rebuilt = asyncio.run(scenario())
+    assert replayed == 6 and rebuilt == incremental
+
+def test_unsupported_languages_count_as_english(mongo):
+    async def scenario():
+        article = ObjectId()
+        await mongo.articles.insert_one({"_id": article, "genre": "Sports"})
+        now = datetime.now(timezone.utc)
+        await apply_events([
+            {"action": "view", "article_id": str(article), "ts": now, "lang": junk}
+            for junk in ("xx", "<script>", None)
+        ])
+        return await engagement_report("lang", days=None)
+
+    assert [(r["key"], r["views"]) for r in asyncio.run(scenario())] == [("en", 3)]
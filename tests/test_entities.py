@@ -0,0 +1,66 @@
+from services.entities import KIND_ORG, KIND_PLACE, EntityExtractor, Gazetteer
+
+def test_matches_whole_words_case_insensitively():
+    gazetteer = Gazetteer()
+    gazetteer.add("Delhi", KIND_PLACE)
+    text = "Rain in DELHI, not in Delhiwala."
+    assert gazetteer.search(text) == [(8, 13, "Delhi", "place")]
+
+def test_prefers_longest_non_overlapping_match():
+    gazetteer = Gazetteer()
+    gazetteer.add("New Delhi", KIND_PLACE)
+    gazetteer.add("Delhi", KIND_PLACE)
+    gazetteer.add("Delhi Police", KIND_ORG)
+    matches = [m[2] for m in gazetteer.search("New Delhi Police and Delhi")]
+    assert matches == ["New Delhi", "Delhi"]
+
+def test_terms_added_after_a_search_are_found():
+    gazetteer = Gazetteer()
+    gazetteer.add("Chennai", KIND_PLACE)
+    assert gazetteer.search("Reserve Bank in Chennai")[0][2] == "Chennai"
+    assert gazetteer.add("Reserve Bank", KIND_ORG)
+    assert [m[3] for m in gazetteer.search("Reserve Bank in Chennai")] == ["organisation", "place"]
+
+def test_extractor_types_names_from_cues_and_finds_numbers():
+    extractor = EntityExtractor()
+    text = "Dr. Meena Iyer of Tata Motors Ltd said on 12 March 2024 that sales in Pune rose 12% to 4,500 cars."
+    extractor.learn(text)
+    result = extractor.extract(text)
+    assert "Meena Iyer" in result["people"]
+    assert "Tata Motors Ltd" in result["organisations"]
+    assert "Pune" in result["places"]
+    assert result["percentages"] == ["12%"]
+    assert "4,500" in result["numbers"]
+    assert result["dates"]
+
+def test_untyped_names_are_learned_after_two_articles():
+    extractor = EntityExtractor()
+    extractor.learn("Officials said Green Valley Project will resume.")
+    assert "Green Valley Project" not in extractor.gazetteer
+    extractor.learn("Work on Green Valley Project began again.")
+    assert "Green Valley Project" in extractor.gazetteer
+
+def test_gazetteer_warm_up_learns_past_articles_off_the_event_loop(mongo, monkeypatch):
+    import asyncio
+    import threading
+
+    from services import ingestion
+    from services.article_store import save_article
+
+    extractor, threads = EntityExtractor(), []
+    learn = extractor.learn
+    def recording_learn(text):
+        threads.append(threading.get_ident())
+        return learn(text)
+    monkeypatch.setattr(extractor, "learn", recording_learn)
+    monkeypatch.setattr(ingestion, "entity_extractor", extractor)
+    monkeypatch.setattr(ingestion, "_gazetteer_warmed", False)
+
+    async def scenario():
+        await save_article({"processing_status": "PASS", "original": {"raw_text": "Officials of Tata Motors Ltd met in Pune."}})
+        await ingestion.warm_gazetteer()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads and loop_thread not in threads
+    assert "Tata Motors Ltd" in extractor.gazetteer
@@ -0,0 +1,28 @@
+from services.nlp_engine import build_fact_index, fact_check_pipeline
+from services.text_document import TokenizedDocument
+
+ORIGINAL = ("Mayor Asha Rao said on Monday that Chennai Corporation will spend 4,500 crore on 20 new "
+            "electric buses, after ridership grew 15% last year.")
+
+def test_faithful_simplification_passes():
+    simplified = ("Mayor Asha Rao spoke on Monday. Chennai Corporation will spend 4,500 crore on 20 new buses. "
+                  "More people rode buses last year.")
+    result = fact_check_pipeline(ORIGINAL, simplified)
+    assert result["status"] == "PASS"
+    assert result["confidence_pct"] == 100.0 and result["failure_reason"] is None
+
+def test_invented_number_fails():
+    simplified = "Mayor Asha Rao said Chennai Corporation will buy 30 new buses."
+    result = fact_check_pipeline(ORIGINAL, simplified)
+    assert result["status"] == "FAIL"
+    assert "30" in result["failure_reason"]
+
+def test_invented_name_fails():
+    simplified = "Minister Vikram Singh said Chennai Corporation will buy 20 new buses."
+    assert fact_check_pipeline(ORIGINAL, simplified)["status"] == "FAIL"
+
+def test_original_index_is_reusable_across_attempts():
+    index = build_fact_index(TokenizedDocument(ORIGINAL))
+    assert "20" in index["numbers"]
+    for simplified in ("Chennai Corporation will buy 20 buses.", "The city will buy 20 buses."):
+        assert fact_check_pipeline(ORIGINAL, simplified, original_index=index) == fact_check_pipeline(ORIGINAL, simplified)
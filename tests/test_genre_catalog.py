@@ -0,0 +1,69 @@
+import asyncio
+
+from services.genre_catalog import ensure_catalog, list_genres, rebuild_catalog, record_article
+
+def article(genre=None, status="PASS", hi=None):
+    doc = {"processing_status": status, "simplified_headline": "Headline"}
+    if genre:
+        doc["genre"] = genre
+    if hi:
+        doc["translations"] = {"hi": {"genre": hi, "is_available": True}}
+    return doc
+
+ARTICLES = [article("Sports", hi="खेल"), article("Sports"), article("Politics"), article(), article("Sports", status="FAIL")]
+
+def test_published_articles_are_counted_with_labels(mongo):
+    async def scenario():
+        for doc in ARTICLES:
+            await record_article(doc)
+        return await list_genres("en"), await list_genres("hi")
+
+    english, hindi = asyncio.run(scenario())
+    assert english == [
+        {"name": "General", "label": "General", "count": 1},
+        {"name": "Politics", "label": "Politics", "count": 1},
+        {"name": "Sports", "label": "Sports", "count": 2},
+    ]
+    assert hindi[-1] == {"name": "Sports", "label": "खेल", "count": 2}
+
+def test_rebuild_matches_incremental_counts(mongo):
+    async def scenario():
+        await mongo.articles.insert_many([dict(doc) for doc in ARTICLES])
+        await mongo.genres.insert_one({"_id": "Weather", "count": 3})
+        rebuilt = await rebuild_catalog()
+        return rebuilt, await list_genres("hi")
+
+    rebuilt, hindi = asyncio.run(scenario())
+    assert rebuilt == 3
+    assert [(g["name"], g["label"], g["count"]) for g in hindi] == [
+        ("General", "General", 1), ("Politics", "Politics", 1), ("Sports", "खेल", 2),
+    ]
+
+def test_empty_catalog_is_built_on_startup_only_once(mongo):
+    async def scenario():
+        await ensure_catalog()
+        nothing_published = await mongo.genres.count_documents({})
+        await mongo.articles.insert_many([dict(doc) for doc in ARTICLES])
+        await ensure_catalog()
+        built = await list_genres()
+        await mongo.genres.update_one({"_id": "Sports"}, {"$set": {"count": 7}})
+        await ensure_catalog()
+        return nothing_published, built, await list_genres()
+
+    nothing_published, built, kept = asyncio.run(scenario())
+    assert nothing_published == 0
+    assert [g["count"] for g in built] == [1, 1, 2]
+    assert kept[-1]["count"] == 7
+
+def test_missing_genres_are_stored_as_general(mongo):
+    from services.article_store import save_article
+
+    async def scenario():
+        await save_article(article())
+        legacy = (await mongo.articles.insert_one(article(status="PASS"))).inserted_id
+        await rebuild_catalog()
+        feed = await mongo.articles.count_documents({"processing_status": "PASS", "genre": "General"})
+        return feed, (await mongo.articles.find_one({"_id": legacy}))["genre"]
+
+    # The feed's genre filter now matches what the catalog counts
+    assert asyncio.run(scenario()) == (2, "General")
@@ -0,0 +1,12 @@
+import asyncio
+
+from auth import get_password_hash_async, verify_password_async
+from services.hashing_pool import hashing_pool
+
+def test_passwords_hash_and_verify_on_the_pool():
+    async def scenario():
+        hashed = await get_password_hash_async("secret")
+        return await verify_password_async("secret", hashed), await verify_password_async("wrong", hashed)
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert hashing_pool.stats()["completed"] >= 3
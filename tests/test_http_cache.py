@@ -0,0 +1,128 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from services.compression import CompressionMiddleware
+from services.http_cache import bytes_response, encode_payload, etag_matches, generation_etag, json_response, not_modified
+
+PAYLOAD = {"items": [{"headline": f"Headline {i}", "text": "Some words. " * 5} for i in range(20)]}
+
+def request_with(if_none_match=None, **headers):
+    if if_none_match:
+        headers["if-none-match"] = if_none_match
+    return Request({"type": "http", "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+def test_etag_is_a_hash_of_the_serialized_body():
+    encoded = encode_payload(PAYLOAD)
+    assert encoded == encode_payload(dict(PAYLOAD))
+    assert encoded.etag != encode_payload({"items": []}).etag
+    assert encode_payload(PAYLOAD, '"fixed"').etag == '"fixed"'
+
+def test_generation_etags_change_with_generation_and_key():
+    assert generation_etag(3, "en", 1) == generation_etag(3, "en", 1)
+    assert generation_etag(4, "en", 1) != generation_etag(3, "en", 1)
+    assert generation_etag(3, "hi", 1) != generation_etag(3, "en", 1)
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False), ('"abc"', True), ('W/"abc"', True), ('"abc-gzip"', True), ('"abc-br"', True),
+    ('"other", "abc"', True), ('"abcd"', False), ("*", True),
+])
+def test_if_none_match(header, matches):
+    assert etag_matches(request_with(header), '"abc"') is matches
+
+AUDIO = bytes(range(100))
+
+@pytest.mark.parametrize("range_header, status, body", [
+    (None, 200, AUDIO), ("bytes=10-19", 206, AUDIO[10:20]), ("bytes=90-", 206, AUDIO[90:]),
+    ("bytes=-5", 206, AUDIO[95:]), ("bytes=95-500", 206, AUDIO[95:]), ("bytes=0-1,5-6", 200, AUDIO),
+])
+def test_byte_ranges(range_header, status, body):
+    headers = {"range": range_header} if range_header else {}
+    response = bytes_response(request_with(**headers), AUDIO, '"a"', "audio/mpeg")
+    assert (response.status_code, response.body) == (status, body)
+    if status == 206:
+        assert response.headers["content-range"] == f"bytes {AUDIO.index(body[0])}-{AUDIO.index(body[-1])}/100"
+
+def test_unsatisfiable_range_and_revalidation():
+    assert bytes_response(request_with(range="bytes=100-"), AUDIO, '"a"', "audio/mpeg").status_code == 416
+    assert bytes_response(request_with('"a"', range="bytes=0-1"), AUDIO, '"a"', "audio/mpeg").status_code == 304
+    # A range for another version of the file gets the whole new file
+    stale = bytes_response(request_with(range="bytes=0-1", if_range='"old"'), AUDIO, '"a"', "audio/mpeg")
+    assert (stale.status_code, stale.body) == (200, AUDIO)
+
+async def json_endpoint(request):
+    encoded = encode_payload(PAYLOAD)
+    if etag_matches(request, encoded.etag):
+        return not_modified(encoded.etag)
+    return json_response(encoded)
+
+async def small_endpoint(request):
+    return json_response(encode_payload({"ok": True}))
+
+async def stream_endpoint(request):
+    async def chunks():
+        for i in range(3):
+            yield f"chunk {i}\n".encode()
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+async def audio_endpoint(request):
+    return Response(b"\xff\xfb" * 2048, media_type="audio/mpeg")
+
+async def audio_stream_endpoint(request):
+    async def segments():
+        for _ in range(3):
+            yield b"\xff\xfb" * 1024
+    return StreamingResponse(segments(), media_type="audio/mpeg")
+
+async def text_range_endpoint(request):
+    return bytes_response(request, b"Some words. " * 200, '"t"', "text/plain")
+
+app = Starlette(routes=[
+    Route("/json", json_endpoint), Route("/small", small_endpoint),
+    Route("/stream", stream_endpoint), Route("/audio", audio_endpoint),
+    Route("/audio-stream", audio_stream_endpoint), Route("/text-range", text_range_endpoint),
+])
+app.add_middleware(CompressionMiddleware)
+client = TestClient(app)
+
+def test_large_json_is_gzipped_with_a_suffixed_etag():
+    plain = client.get("/json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    compressed = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert "accept-encoding" in compressed.headers["vary"].lower()
+    assert compressed.json() == plain.json() == PAYLOAD
+
+def test_matching_etag_in_either_encoding_returns_304():
+    etag = client.get("/json", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    response = client.get("/json", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+
+def test_small_and_binary_bodies_are_not_compressed():
+    for path in ("/small", "/audio"):
+        assert "content-encoding" not in client.get(path, headers={"Accept-Encoding": "gzip"}).headers
+
+def test_streamed_text_is_compressed_chunk_by_chunk():
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "chunk 0\nchunk 1\nchunk 2\n"
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_streamed_audio_and_range_responses_are_not_compressed(encoding):
+    streamed = client.get("/audio-stream", headers={"Accept-Encoding": encoding})
+    assert "content-encoding" not in streamed.headers and streamed.content == b"\xff\xfb" * 3072
+    # Byte offsets of a 206 refer to the stored bytes; compressing them would corrupt the range
+    partial = client.get("/text-range", headers={"Accept-Encoding": encoding, "Range": "bytes=0-9"})
+    assert partial.status_code == 206 and "content-encoding" not in partial.headers
+    assert partial.content == b"Some words"
+
+def test_brotli_is_preferred_when_accepted():
+    response = client.get("/json", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"].endswith('-br"')
+    assert response.json() == PAYLOAD
@@ -0,0 +1,39 @@
+import asyncio
+
+from services.indexes import HOT_QUERIES, INDEXES, ensure_indexes, plan_stages
+
+def leading_fields(collection):
+    # Every collection has the built-in _id index
+    return {"_id"} | {next(iter(model.document["key"])) for model in INDEXES.get(collection, [])}
+
+def test_every_hot_query_can_use_an_index():
+    # Offline stand-in for `--check`: each filter (each $or branch) starts with an indexed field
+    for label, collection, query, sort in HOT_QUERIES:
+        branches = query.get("$or", [query])
+        for branch in branches:
+            fields = set(branch) | {field for field, _ in sort or []}
+            assert fields & leading_fields(collection), label
+
+def test_plan_stages_walks_classic_and_slot_based_plans():
+    classic = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}
+    sbe = {"queryPlan": {"stage": "SORT", "inputStages": [{"stage": "COLLSCAN"}, classic]}}
+    assert list(plan_stages(classic)) == ["FETCH", "IXSCAN"]
+    assert set(plan_stages(sbe)) == {"SORT", "COLLSCAN", "FETCH", "IXSCAN"}
+
+def test_ensure_indexes_creates_the_registry(mongo):
+    async def scenario():
+        failed = await ensure_indexes()
+        return failed, {name: set(await mongo.get_collection(name).index_information()) for name in INDEXES}
+
+    failed, created = asyncio.run(scenario())
+    assert failed == 0
+    for name, models in INDEXES.items():
+        assert {m.document["name"] for m in models} <= created[name]
+
+def test_hot_queries_cover_the_service_lookups():
+    labels = {label for label, *_ in HOT_QUERIES}
+    assert {"article bodies", "answer key", "user rollup", "user distinct read", "user rollup seed"} <= labels
+    seed = next(q for q in HOT_QUERIES if q[0] == "user rollup seed")
+    # Filter fields then sort fields match one compound index: the $in on action merges two ordered scans
+    keys = [list(m.document["key"]) for m in INDEXES["metrics"]]
+    assert [*seed[2], *(field for field, _ in seed[3])] in keys
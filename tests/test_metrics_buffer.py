@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from services import metrics_buffer
+from services.metrics_buffer import MetricsBuffer
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(metrics_buffer, "METRICS_RETRY_BACKOFF_SECONDS", 0)
+
+def test_events_are_written_in_batches_and_fed_to_sinks(mongo):
+    batches = []
+
+    async def sink(events):
+        batches.append([e["n"] for e in events])
+
+    async def scenario():
+        buffer = MetricsBuffer(mongo.metrics, batch_size=3, flush_interval=0.05)
+        buffer.add_sink(sink)
+        for n in range(4):
+            await buffer.record({"n": n})
+        await asyncio.sleep(0.1)
+        await buffer.record({"n": 4})
+        await buffer.stop()
+        return buffer.stats(), await mongo.metrics.count_documents({})
+
+    stats, stored = asyncio.run(scenario())
+    assert batches == [[0, 1, 2], [3], [4]]
+    assert stored == 5
+    assert (stats["written"], stats["flushes"], stats["queued"]) == (5, 3, 0)
+
+def test_stop_drains_queued_events(mongo):
+    async def scenario():
+        buffer = MetricsBuffer(mongo.metrics, batch_size=100, flush_interval=60)
+        for n in range(10):
+            await buffer.record({"n": n})
+        await buffer.stop()
+        return await mongo.metrics.count_documents({})
+
+    assert asyncio.run(scenario()) == 10
+
+class FlakyCollection:
+    """Fails the first `failures` inserts, then stores documents like a collection would."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.documents = []
+
+    async def insert_many(self, documents, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        self.documents.extend(documents)
+
+class BrokenCollection(FlakyCollection):
+    def __init__(self):
+        super().__init__(failures=float("inf"))
+
+def run_batch(collection, events, **options):
+    batches = []
+
+    async def sink(written):
+        batches.append(written)
+
+    async def scenario():
+        buffer = MetricsBuffer(collection, batch_size=len(events), flush_interval=0.01, **options)
+        buffer.add_sink(sink)
+        for e in events:
+            await buffer.record(e)
+        await buffer.stop()
+        return buffer.stats()
+
+    return asyncio.run(scenario()), batches
+
+def test_failed_inserts_are_retried():
+    collection = FlakyCollection(failures=2)
+    stats, batches = run_batch(collection, [{"n": 1}, {"n": 2}])
+    assert len(collection.documents) == 2 and batches == [[{"n": 1}, {"n": 2}]]
+    assert (stats["written"], stats["failed"], stats["retries"]) == (2, 0, 2)
+
+class PartlyRejectingCollection:
+    async def insert_many(self, documents, ordered=True):
+        raise BulkWriteError({"writeErrors": [
+            {"index": 0, "code": 121, "errmsg": "Document failed validation"},
+            # Written by an earlier attempt that only looked failed
+            {"index": 2, "code": 11000, "errmsg": "E11000 duplicate key"},
+        ]})
+
+def test_sinks_get_exactly_the_written_events():
+    stats, batches = run_batch(PartlyRejectingCollection(), [{"n": 1}, {"n": 2}, {"n": 3}])
+    assert batches == [[{"n": 2}, {"n": 3}]]
+    assert (stats["written"], stats["failed"], stats["retries"]) == (2, 1, 0)
+
+def test_failed_batches_are_counted_and_not_fed_to_sinks():
+    batches = []
+
+    async def sink(events):
+        batches.append(events)
+
+    async def scenario():
+        buffer = MetricsBuffer(BrokenCollection(), batch_size=2, flush_interval=0.01, max_retries=2)
+        buffer.add_sink(sink)
+        await buffer.record({"n": 1})
+        await buffer.stop()
+        return buffer.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["written"], stats["failed"], stats["retries"]) == (0, 1, 2)
+    assert batches == []
+
+def test_a_failing_sink_is_retried_and_does_not_starve_the_others():
+    fed, calls = [], []
+
+    async def flaky(events):
+        calls.append(len(events))
+        if len(calls) < 3:
+            raise ConnectionError("rollups unavailable")
+        fed.append(events)
+
+    async def broken(events):
+        raise ValueError("bad event")
+
+    async def scenario():
+        collection = FlakyCollection(failures=0)
+        buffer = MetricsBuffer(collection, batch_size=2, flush_interval=0.01, max_retries=2)
+        buffer.add_sink(broken)
+        buffer.add_sink(flaky)
+        for n in range(2):
+            await buffer.record({"n": n})
+        await buffer.stop()
+        return buffer.stats()
+
+    stats = asyncio.run(scenario())
+    assert fed == [[{"n": 0}, {"n": 1}]] and calls == [2, 2, 2]
+    # broken: 2 retries, then counted as failed; flaky: 2 retries, then fed
+    assert (stats["written"], stats["retries"], stats["sink_failures"]) == (2, 4, 1)
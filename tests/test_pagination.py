@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from services.article_store import save_article
+from services.pagination import decode_cursor, encode_cursor, query_fingerprint
+
+def test_cursor_round_trip():
+    last_id = ObjectId()
+    fingerprint = query_fingerprint("", "Sports", "en")
+    assert decode_cursor(encode_cursor(last_id, fingerprint), fingerprint) == last_id
+
+def test_cursor_rejected_for_another_filter():
+    token = encode_cursor(ObjectId(), query_fingerprint("", "Sports", "en"))
+    with pytest.raises(ValueError):
+        decode_cursor(token, query_fingerprint("", "Politics", "en"))
+
+@pytest.mark.parametrize("token", ["", "not-base64!", "e30", encode_cursor("not-an-object-id", "f")])
+def test_malformed_cursor_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, "f")
+
+async def publish(genres):
+    for genre in genres:
+        await save_article({"processing_status": "PASS", "genre": genre, "simplified_headline": genre,
+                            "original": {"published_date": "2024-05-01"}})
+
+def test_feed_pages_follow_cursors_with_catalog_totals(mongo):
+    import main
+
+    async def scenario():
+        await publish(["Sports", "Politics", "Sports", "Sports"])
+        first = await main.build_article_page("en", 1, 2, "", "Sports", "")
+        rest = await main.build_article_page("en", 1, 2, "", "Sports", first["pagination"]["next_cursor"])
+        everything = await main.build_article_page("en", 1, 10, "", "All", "")
+        return first, rest, everything
+
+    first, rest, everything = asyncio.run(scenario())
+    assert (first["pagination"]["total_articles"], first["pagination"]["total_pages"]) == (3, 2)
+    assert len(first["articles"]) == 2 and len(rest["articles"]) == 1
+    assert rest["pagination"]["next_cursor"] is None
+    assert everything["pagination"]["total_articles"] == 4
+
+def test_deep_page_numbers_must_use_the_cursor(mongo, monkeypatch):
+    import main
+    monkeypatch.setattr(main, "MAX_PAGE_OFFSET", 2)
+
+    async def scenario():
+        await publish(["Sports"] * 5)
+        return (await main.build_article_page("en", 2, 2, "", "All", ""),
+                await main.build_article_page("en", 3, 2, "", "All", ""))
+
+    shallow, deep = asyncio.run(scenario())
+    assert shallow["pagination"]["current_page"] == 2 and len(shallow["articles"]) == 2
+    assert "error" in deep
@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.answer_keys import question_results
+from services.article_store import save_article
+from services.quiz_analytics import apply_events, describe, discrimination, question_report
+
+QUIZZES = [
+    {"id": 1, "question_text": "Easy?", "question_type": "ai_generated", "answers": [
+        {"id": 10, "answer_text": "Yes", "is_correct": True}, {"id": 11, "answer_text": "No"},
+    ]},
+    {"id": 2, "question_text": "Hard?", "question_type": "dynamic", "answers": [
+        {"id": 20, "answer_text": "Right", "is_correct": True}, {"id": 21, "answer_text": "Tempting"},
+    ]},
+    {"id": 3, "question_text": "Medium?", "question_type": "ai_generated", "answers": [
+        {"id": 30, "answer_text": "Right", "is_correct": True}, {"id": 31, "answer_text": "Wrong"},
+    ]},
+]
+
+# Selections of ten readers: question 2 is mostly missed in favour of one distractor
+SUBMISSIONS = [
+    {"1": 10, "2": 20, "3": 30}, {"1": 10, "2": 21, "3": 30}, {"1": 10, "2": 21, "3": 30},
+    {"1": 10, "2": 21, "3": 31}, {"1": 10, "2": 21, "3": 31}, {"1": 10, "2": 21, "3": 30},
+    {"1": 10, "2": 21}, {"1": 10, "2": 21, "3": 31}, {"1": 11, "2": 20, "3": 30}, {"1": 10, "2": 21, "3": 30},
+]
+
+async def record_submissions(mongo):
+    article = {"processing_status": "PASS", "simplified_headline": "Quiz", "quizzes": QUIZZES}
+    article_id = str(await save_article(article))
+    answer_key = (await mongo.articles.find_one())["answer_key"]
+    events = [{"action": "quiz", "article_id": article_id, "question_results": question_results(answer_key, s)}
+              for s in SUBMISSIONS]
+    # Two flushed batches plus an event without per-question data
+    await apply_events(events[:4])
+    await apply_events(events[4:] + [{"action": "quiz", "article_id": article_id}])
+    return answer_key
+
+def test_discrimination_matches_point_biserial_correlation(mongo):
+    async def scenario():
+        answer_key = await record_submissions(mongo)
+        return answer_key, await mongo.quiz_stats.find_one({"quiz_id": "3"})
+
+    answer_key, stats = asyncio.run(scenario())
+    outcomes = [[r["correct"] for r in question_results(answer_key, s)] for s in SUBMISSIONS]
+    item = np.array([o[2] for o in outcomes], dtype=float)
+    rest = np.array([(sum(o) - o[2]) / 2 * 100 for o in outcomes])
+    assert stats["attempts"] == 10
+    assert discrimination(stats) == pytest.approx(np.corrcoef(item, rest)[0, 1])
+    assert discrimination({"attempts": 5, "correct": 5}) is None
+
+def test_report_ranks_the_hardest_questions_first_with_flags(mongo):
+    async def scenario():
+        await record_submissions(mongo)
+        return (await question_report(), await question_report(question_type="dynamic"),
+                await question_report(min_attempts=11))
+
+    rows, dynamic, none = asyncio.run(scenario())
+    assert [r["question"] for r in rows] == ["Hard?", "Medium?", "Easy?"]
+    hard = rows[0]
+    assert hard["difficulty"] == 0.8
+    assert hard["distractors"] == [{"answer_id": "21", "text": "Tempting", "picked": 8}]
+    assert "distractor_beats_answer" in hard["flags"]
+    assert rows[1]["unanswered"] == 1
+    assert [r["question"] for r in dynamic] == ["Hard?"]
+    assert none == []
+
+def test_ranking_and_limit_run_in_the_database(mongo):
+    async def scenario():
+        await record_submissions(mongo)
+        # Counter documents with a defined, an undefined and a negative discrimination
+        await mongo.quiz_stats.insert_many([
+            {"_id": "x:1", "question": "Everyone right", "attempts": 12, "correct": 12, "rest_sum": 600.0,
+             "rest_sq_sum": 36000.0, "rest_correct_sum": 600.0},
+            {"_id": "x:2", "question": "Backwards", "attempts": 12, "correct": 6, "rest_sum": 600.0,
+             "rest_sq_sum": 42000.0, "rest_correct_sum": 120.0},
+        ])
+        everything = [describe(s) async for s in mongo.quiz_stats.find({})]
+        return everything, await question_report("discrimination"), await question_report(limit=2)
+
+    everything, by_discrimination, top_two = asyncio.run(scenario())
+    expected = sorted(everything, key=lambda r: (r["discrimination"] is None, r["discrimination"] or 0))
+    assert [r["question"] for r in by_discrimination] == [r["question"] for r in expected]
+    assert by_discrimination[0]["question"] == "Backwards" and by_discrimination[-1]["discrimination"] is None
+    assert [r["question"] for r in top_two] == ["Hard?", "Backwards"]
@@ -0,0 +1,28 @@
+import pytest
+
+from services.nlp_engine import calculate_readability_score, calculate_readability_scores, count_syllables, simplify_to_grade_6
+
+@pytest.mark.parametrize("word, syllables", [
+    ("cat", 1), ("make", 1), ("table", 2), ("agree", 2), ("jumped", 1), ("wanted", 2), ("government", 3),
+])
+def test_count_syllables(word, syllables):
+    assert count_syllables(word) == syllables
+
+def test_grade_follows_flesch_kincaid():
+    # 1 sentence, 4 words, 4 syllables: 0.39 * 4 + 11.8 * 1 - 15.59 clips to 0
+    assert calculate_readability_score("The cat sat down.") == 0.0
+    text = "The government announced comprehensive infrastructure investments yesterday."
+    syllables = sum(count_syllables(w) for w in text.rstrip(".").split())
+    assert calculate_readability_score(text) == pytest.approx(0.39 * 7 + 11.8 * syllables / 7 - 15.59)
+
+def test_batch_scores_match_single_scores():
+    texts = ["", "Short words help.", "Municipal authorities postponed the international conference indefinitely."]
+    assert list(calculate_readability_scores(texts)) == [calculate_readability_score(t) for t in texts]
+
+def test_lower_sentence_limit_lowers_the_grade():
+    text = ("The council approved the new budget for the city schools on Monday, and the mayor said "
+            "the money would pay for teachers; parents welcomed the decision at a crowded meeting.")
+    loose = simplify_to_grade_6(text, {}, max_sentence_words=None)
+    strict = simplify_to_grade_6(text, {}, max_sentence_words=12)
+    assert strict.count(".") > loose.count(".")
+    assert calculate_readability_score(strict) < calculate_readability_score(loose)
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from services.response_cache import ResponseCache
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+def counting(value, delay=0.0):
+    calls = []
+    async def compute():
+        calls.append(value)
+        await asyncio.sleep(delay)
+        return value
+    return compute, calls
+
+def test_hits_until_the_generation_is_bumped(cache_path):
+    cache = ResponseCache(cache_path)
+    compute, calls = counting({"items": [1]})
+
+    async def scenario():
+        first = await cache.get_or_compute("feed", ["en", 1], compute)
+        second = await cache.get_or_compute("feed", ["en", 1], compute)
+        cache.bump_generation()
+        third = await cache.get_or_compute("feed", ["en", 1], compute)
+        return first, second, third
+
+    assert asyncio.run(scenario()) == ({"items": [1]},) * 3
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+
+def test_uncacheable_results_are_recomputed(cache_path):
+    cache = ResponseCache(cache_path)
+    compute, calls = counting({"error": "bad cursor"})
+
+    async def scenario():
+        for _ in range(2):
+            await cache.get_or_compute("feed", ["x"], compute, cacheable=lambda value: "error" not in value)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+def test_concurrent_misses_compute_once(cache_path):
+    cache = ResponseCache(cache_path)
+    compute, calls = counting([1, 2, 3], delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("feed", ["en"], compute) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [[1, 2, 3]] * 5
+    assert len(calls) == 1
+
+def test_other_workers_wait_for_the_lease_holder(cache_path):
+    # Two instances on one file behave like two gunicorn workers
+    first, second = ResponseCache(cache_path), ResponseCache(cache_path)
+    slow, slow_calls = counting("page", delay=0.2)
+    fast, fast_calls = counting("page")
+
+    async def scenario():
+        holder = asyncio.create_task(first.get_or_compute("feed", ["en"], slow))
+        await asyncio.sleep(0.05)
+        return await asyncio.gather(holder, second.get_or_compute("feed", ["en"], fast))
+
+    assert asyncio.run(scenario()) == ["page", "page"]
+    assert (len(slow_calls), len(fast_calls)) == (1, 0)
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_computation(cache_path):
+    cache = ResponseCache(cache_path)
+    compute, calls = counting("page", delay=0.1)
+
+    async def scenario():
+        first = asyncio.create_task(cache.get_or_compute("feed", ["en"], compute))
+        await asyncio.sleep(0.02)
+        second = asyncio.create_task(cache.get_or_compute("feed", ["en"], compute))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        return await second, await cache.get_or_compute("feed", ["en"], compute)
+
+    assert asyncio.run(scenario()) == ("page", "page")
+    assert len(calls) == 1
+
+def test_old_entries_and_leases_are_pruned_on_write(cache_path):
+    cache = ResponseCache(cache_path)
+    compute, _ = counting("page")
+    asyncio.run(cache.get_or_compute("search", ["old query"], compute))
+    conn = cache._conn()
+    conn.execute("UPDATE entries SET created = created - 3600")
+    conn.execute("INSERT OR REPLACE INTO leases (key, owner, expires) VALUES ('stale', 'gone', 0)")
+
+    cache._last_prune = 0.0
+    asyncio.run(cache.get_or_compute("search", ["new query"], compute))
+    assert conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM leases WHERE key = 'stale'").fetchone()[0] == 0
+
+def test_a_broken_store_does_not_fail_the_bump(cache_path):
+    cache = ResponseCache(cache_path)
+    cache._conn().execute("DROP TABLE meta")
+    assert cache.bump_generation() is None
@@ -0,0 +1,81 @@
+import asyncio
+
+import mongomock_motor
+from bson import ObjectId
+
+from services.search_index import SearchIndex, tokenize
+from services.suggest_index import SuggestIndex
+
+def article(headline, text="", genre="Politics", **extra):
+    return {"_id": ObjectId(), "processing_status": "PASS", "simplified_headline": headline,
+            "simplified_text": text, "genre": genre, **extra}
+
+def test_tokenize_keeps_indic_words_whole():
+    assert tokenize("क्रिकेट टीम जीती! The Budget") == ["क्रिकेट", "टीम", "जीती", "budget"]
+
+def test_headline_matches_rank_above_body_matches():
+    index = SearchIndex()
+    body_only = article("Council meets", "The budget was discussed among other things at length today.")
+    headline = article("Budget approved", "Council members voted.")
+    index.add_article(body_only)
+    index.add_article(headline)
+    assert index.search("budget") == [str(headline["_id"]), str(body_only["_id"])]
+
+def test_genre_filter_and_no_match():
+    index = SearchIndex()
+    sports = article("Cricket budget", genre="Sports")
+    politics = article("Budget vote")
+    index.add_article(sports)
+    index.add_article(politics)
+    assert index.search("budget", genre="Sports") == [str(sports["_id"])]
+    assert index.search("budget", genre="Weather") == []
+    assert index.search("flood") == []
+
+def test_hindi_search_falls_back_to_english_index():
+    index = SearchIndex()
+    doc = article("Budget approved", translations={"hi": {"headline": "बजट मंज़ूर", "simplified_text": ""}})
+    index.add_article(doc)
+    assert index.search("बजट", "hi") == [str(doc["_id"])]
+    assert index.search("budget", "hi") == [str(doc["_id"])]
+
+def test_refresh_indexes_new_published_articles_only():
+    async def scenario():
+        collection = mongomock_motor.AsyncMongoMockClient().db.articles
+        index = SearchIndex()
+        published = article("Budget approved")
+        await collection.insert_one(dict(published))
+        await collection.insert_one({**article("Budget rejected"), "processing_status": "FAIL"})
+        await index.refresh(collection, force=True)
+        await index.refresh(collection, force=True)
+        return index, published
+
+    index, published = asyncio.run(scenario())
+    assert len(index) == 1
+    assert index.search("budget") == [str(published["_id"])]
+
+def test_refresh_tails_inserts_from_other_workers():
+    async def scenario():
+        collection = mongomock_motor.AsyncMongoMockClient().db.articles
+        index, suggestions = SearchIndex(), SuggestIndex()
+        index.subscribe(suggestions.add_article)
+        first = article("Budget alpha")
+        await collection.insert_one(dict(first))
+        await index.refresh(collection, force=True)
+
+        # Another worker inserts X; this worker then ingests Y and indexes it directly
+        other = article("Budget beta")
+        own = article("Budget gamma")
+        await collection.insert_one(dict(other))
+        await collection.insert_one(dict(own))
+        index.add_article(own)
+        await collection.insert_one({**article("Budget rejected"), "processing_status": "FAIL"})
+        await index.refresh(collection, force=True)
+        await index.refresh(collection, force=True)
+        return index, suggestions, [str(a["_id"]) for a in (own, other, first)]
+
+    index, suggestions, newest_first = asyncio.run(scenario())
+    assert len(index) == 3
+    # Equal scores rank by recency (`_id`), whatever order the articles arrived in
+    assert index.search("budget") == newest_first
+    assert [s["id"] for s in suggestions.suggest("bud")] == newest_first
+    assert [s["id"] for s in suggestions.suggest("budget ")] == newest_first
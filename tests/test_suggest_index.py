@@ -0,0 +1,47 @@
+from bson import ObjectId
+
+from services.suggest_index import SuggestIndex
+
+def add(index, headline, **extra):
+    article = {"_id": ObjectId(), "simplified_headline": headline, **extra}
+    index.add_article(article)
+    return str(article["_id"])
+
+def ids(suggestions):
+    return [s["id"] for s in suggestions]
+
+def test_prefix_matches_any_headline_word_newest_first():
+    index = SuggestIndex()
+    budget = add(index, "Budget approved")
+    rail = add(index, "New rail budget")
+    add(index, "Rain expected")
+    assert ids(index.suggest("bud")) == [rail, budget]
+    assert ids(index.suggest("budg")) == [rail, budget]
+    assert index.suggest("budget")[0] == {"id": rail, "headline": "New rail budget"}
+
+def test_complete_words_must_all_appear():
+    index = SuggestIndex()
+    add(index, "Rail budget approved")
+    road = add(index, "Road budget approved")
+    add(index, "Road safety week")
+    assert ids(index.suggest("road bud")) == [road]
+    assert ids(index.suggest("budget road ")) == [road]
+    assert index.suggest("flood ") == []
+
+def test_suggestions_per_language_and_limit():
+    index = SuggestIndex()
+    numbers = [add(index, f"Budget session day {i}") for i in range(15)]
+    hindi = add(index, "Budget passed", translations={"hi": {"headline": "बजट पास", "simplified_text": ""}})
+    assert ids(index.suggest("बज", "hi")) == [hindi]
+    assert ids(index.suggest("session", limit=3)) == numbers[::-1][:3]
+    assert len(index.suggest("bu")) == 10
+
+def test_old_matches_are_found_behind_many_newer_distractors():
+    index = SuggestIndex()
+    road = add(index, "Road budget approved")
+    # Newer headlines match the prefix or the complete word, but never both
+    for i in range(60):
+        add(index, f"Budget session day {i}")
+        add(index, f"Road works week {i}")
+    assert ids(index.suggest("road bud")) == [road]
+    assert ids(index.suggest("road approved ")) == [road]
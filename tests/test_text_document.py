@@ -0,0 +1,26 @@
+from services.text_document import TokenizedDocument
+
+def test_abbreviations_initials_and_decimals_do_not_end_sentences():
+    doc = TokenizedDocument("Dr. Rao met J. K. Rowling in the U.S. today. Prices rose 4.5% to Rs 4,500! Why?")
+    assert doc.sentences == [
+        "Dr. Rao met J. K. Rowling in the U.S. today.",
+        "Prices rose 4.5% to Rs 4,500!",
+        "Why?",
+    ]
+
+def test_words_keep_contractions_and_numbers_whole():
+    doc = TokenizedDocument("They don't pay 4,500 or 3.5 each.")
+    assert doc.words == ["They", "don't", "pay", "4,500", "or", "3.5", "each"]
+
+def test_per_sentence_words_and_counts():
+    doc = TokenizedDocument("  One two three.  Four five! Six")
+    assert doc.sentence_count == 3 and doc.word_count == 6
+    assert [doc.sentence_word_count(i) for i in range(3)] == [3, 2, 1]
+    assert doc.sentence_words(1) == ["Four", "five"]
+    assert doc.sentence(2) == "Six"
+    assert doc.text[slice(*doc.sentence_span(1))] == "Four five!"
+
+def test_of_reuses_an_existing_document():
+    doc = TokenizedDocument("Text.")
+    assert TokenizedDocument.of(doc) is doc
+    assert TokenizedDocument.of(None).sentence_count == 0
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from services import tts
+from services.bounded_executor import BoundedExecutor, PoolSaturated
+
+@pytest.fixture
+def audio_cache(tmp_path, monkeypatch):
+    cache = tts.AudioCache(directory=str(tmp_path))
+    monkeypatch.setattr(tts, "audio_cache", cache)
+    return cache
+
+def collect(text, lang="en", concurrency=3):
+    async def run():
+        return [segment async for segment in tts.stream_audio(text, lang, concurrency)]
+    return asyncio.run(run())
+
+def test_cache_key_ignores_whitespace_and_case_of_the_language():
+    assert tts.audio_key("Hello   world.\n", "EN") == tts.audio_key("Hello world.", "en")
+    assert tts.audio_key("Hello world.", "hi") != tts.audio_key("Hello world.", "en")
+
+def test_cache_round_trip_and_lru_eviction(tmp_path):
+    cache = tts.AudioCache(directory=str(tmp_path), max_bytes=250)
+    cache.put("aa" + "0" * 62, b"x" * 100)
+    cache.put("bb" + "0" * 62, b"y" * 100)
+    old = cache.path("aa" + "0" * 62)
+    os.utime(old, (1, 1))
+    cache.put("cc" + "0" * 62, b"z" * 100)
+    assert cache.get("aa" + "0" * 62) is None
+    assert cache.get("cc" + "0" * 62) == b"z" * 100
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_audio_is_synthesized_once_then_served_from_disk(audio_cache, monkeypatch):
+    calls = []
+    def fake_synthesize(text, lang):
+        calls.append(text)
+        return b"mp3:" + text.encode("utf-8")
+    monkeypatch.setattr(tts, "synthesize", fake_synthesize)
+
+    first = asyncio.run(tts.get_audio("Hello   world.", "en"))
+    second = asyncio.run(tts.get_audio("Hello world.", "en"))
+    assert first == second == (b"mp3:Hello world.", tts.audio_key("Hello world.", "en"))
+    assert calls == ["Hello world."]
+
+def test_stub_synthesizer_is_selected():
+    assert tts.TTS_SYNTHESIZER == "stub"
+    assert tts.synthesize("one two", "en") == tts.stub_synthesize("one two", "en")
+
+def test_split_sentences_keeps_unterminated_tail():
+    assert tts.split_sentences("First one. Second!  Third without stop") == ["First one.", "Second!", "Third without stop"]
+    assert tts.split_sentences("पहला वाक्य। दूसरा") == ["पहला वाक्य।", "दूसरा"]
+
+def test_stream_yields_segments_in_order_when_later_ones_finish_first(audio_cache, monkeypatch):
+    # Earlier sentences are slower, so the look-ahead finishes them last
+    def slow_stub(text, lang):
+        time.sleep({"Alpha.": 0.15, "Beta.": 0.05}.get(text, 0))
+        return text.encode("utf-8")
+    monkeypatch.setattr(tts, "stub_synthesize", slow_stub)
+
+    text = "Alpha. Beta. Gamma."
+    assert collect(text) == [b"Alpha.", b"Beta.", b"Gamma."]
+    # The whole article and each sentence are cached
+    assert audio_cache.get(tts.article_audio_key(text, "en")) == b"Alpha.Beta.Gamma."
+    assert audio_cache.get(tts.audio_key("Beta.", "en")) == b"Beta."
+
+def test_cached_sentences_are_not_synthesized_again(audio_cache, monkeypatch):
+    calls = []
+    def counting_stub(text, lang):
+        calls.append(text)
+        return text.encode("utf-8")
+    monkeypatch.setattr(tts, "stub_synthesize", counting_stub)
+
+    asyncio.run(tts.get_audio("Beta.", "en"))
+    collect("Alpha. Beta.")
+    assert calls == ["Beta.", "Alpha."]
+
+def test_failed_segment_is_skipped_and_article_not_cached(audio_cache, monkeypatch):
+    def flaky_stub(text, lang):
+        if text == "Broken.":
+            raise RuntimeError("synthesis failed")
+        return text.encode("utf-8")
+    monkeypatch.setattr(tts, "stub_synthesize", flaky_stub)
+
+    text = "Fine. Broken. Also fine."
+    assert collect(text) == [b"Fine.", b"Also fine."]
+    assert audio_cache.get(tts.article_audio_key(text, "en")) is None
+
+def test_concurrent_requests_share_one_synthesis(audio_cache, monkeypatch):
+    calls = []
+    def slow_stub(text, lang):
+        calls.append(text)
+        time.sleep(0.1)
+        return b"mp3"
+    monkeypatch.setattr(tts, "stub_synthesize", slow_stub)
+
+    async def scenario():
+        return await asyncio.gather(*(tts.get_audio("Shared.", "en") for _ in range(3)))
+
+    results = asyncio.run(scenario())
+    assert [data for data, _ in results] == [b"mp3"] * 3 and calls == ["Shared."]
+
+def test_only_syntheses_are_charged_to_the_user(audio_cache, monkeypatch):
+    monkeypatch.setattr(tts, "user_budgets", tts.TokenBuckets(capacity=1, rate=0.001))
+
+    async def scenario():
+        await tts.get_audio("One.", "en", user_id="u")
+        # Cache hit: free
+        await tts.get_audio("One.", "en", user_id="u")
+        with pytest.raises(tts.BudgetExceeded):
+            await tts.get_audio("Two.", "en", user_id="u")
+
+    asyncio.run(scenario())
+
+def test_full_synthesis_pool_rejects_new_work(audio_cache, monkeypatch):
+    monkeypatch.setattr(tts, "synthesis_pool", BoundedExecutor(workers=1, max_queue=0, name="tts-test"))
+    monkeypatch.setattr(tts, "stub_synthesize", lambda text, lang: time.sleep(0.1) or b"mp3")
+
+    async def scenario():
+        first = asyncio.create_task(tts.get_audio("One.", "en"))
+        await asyncio.sleep(0.02)
+        with pytest.raises(PoolSaturated):
+            await tts.get_audio("Two.", "en")
+        return await first
+
+    assert asyncio.run(scenario())[0] == b"mp3"
+
+def test_a_rejected_synthesis_is_not_charged(audio_cache, monkeypatch):
+    monkeypatch.setattr(tts, "synthesis_pool", BoundedExecutor(workers=1, max_queue=0, name="tts-test"))
+    monkeypatch.setattr(tts, "user_budgets", tts.TokenBuckets(capacity=1, rate=0.001))
+    monkeypatch.setattr(tts, "stub_synthesize", lambda text, lang: time.sleep(0.1) or b"mp3")
+
+    async def scenario():
+        first = asyncio.create_task(tts.get_audio("One.", "en"))
+        await asyncio.sleep(0.02)
+        with pytest.raises(PoolSaturated):
+            await tts.get_audio("Two.", "en", user_id="u")
+        await first
+        # The rejected attempt gave its token back
+        return await tts.get_audio("Two.", "en", user_id="u")
+
+    assert asyncio.run(scenario())[0] == b"mp3"
+
+def test_user_budget_rejects_bursts():
+    buckets = tts.TokenBuckets(capacity=2, rate=0.001)
+    buckets.consume("u")
+    buckets.consume("u")
+    with pytest.raises(tts.BudgetExceeded) as exceeded:
+        buckets.consume("u")
+    assert exceeded.value.retry_after > 0
+    buckets.consume("other")
+
+ARTICLE = {
+    "simplified_headline": "Budget approved",
+    "simplified_text": "The council met. It approved the budget.",
+    "translations": {
+        "hi": {"simplified_text": "परिषद मिली। बजट मंज़ूर हुआ।", "is_available": True},
+        "ta": {"simplified_text": "Not ready.", "is_available": False},
+    },
+}
+
+def test_article_texts_skip_unavailable_translations():
+    assert tts.article_texts(ARTICLE, ["en", "hi", "ta"]) == {
+        "en": ARTICLE["simplified_text"], "hi": ARTICLE["translations"]["hi"]["simplified_text"],
+    }
+
+def test_pregeneration_fills_the_cache_for_every_language(audio_cache):
+    asyncio.run(tts.pregenerate_article_audio(ARTICLE, ["en", "hi"]))
+    for lang, text in tts.article_texts(ARTICLE, ["en", "hi"]).items():
+        assert audio_cache.get(tts.article_audio_key(text, lang)) is not None
+        for sentence in tts.split_sentences(text):
+            assert audio_cache.get(tts.audio_key(sentence, lang)) is not None
+
+@pytest.fixture
+def busy_pool(monkeypatch):
+    pool = BoundedExecutor(workers=1, max_queue=4, name="tts-test")
+    # A reader's synthesis that never finishes, as far as pre-generation can tell
+    pool.in_flight = 1
+    monkeypatch.setattr(tts, "synthesis_pool", pool)
+    monkeypatch.setattr(tts, "pregeneration_counts", {"completed": 0, "retried": 0, "skipped": 0})
+    for name, value in (("PREGENERATE_IDLE_POLL_SECONDS", 0.01), ("PREGENERATE_MAX_WAIT_SECONDS", 0.02),
+                        ("PREGENERATE_RETRY_DELAY_SECONDS", 0.05), ("PREGENERATE_MAX_ATTEMPTS", 2)):
+        monkeypatch.setattr(tts, name, value)
+    return pool
+
+def test_pregeneration_deferred_by_a_busy_pool_is_retried(audio_cache, busy_pool):
+    async def scenario():
+        task = asyncio.create_task(tts._pregenerate_with_retries(ARTICLE))
+        await asyncio.sleep(0.04)
+        busy_pool.in_flight = 0
+        return await task
+
+    assert asyncio.run(scenario()) is True
+    assert tts.pregeneration_counts == {"completed": 1, "retried": 1, "skipped": 0}
+    assert audio_cache.get(tts.article_audio_key(ARTICLE["simplified_text"], "en")) is not None
+
+def test_pregeneration_gives_up_after_the_last_attempt_and_counts_it(audio_cache, busy_pool):
+    assert asyncio.run(tts._pregenerate_with_retries(ARTICLE)) is False
+    assert tts.pregeneration_counts == {"completed": 0, "retried": 1, "skipped": 1}
+    assert tts.pregeneration_stats()["skipped"] == 1
+
+def test_pregeneration_is_off_by_default():
+    assert tts.schedule_audio_pregeneration(ARTICLE) is None
+
+def test_a_cancelled_request_does_not_cancel_the_shared_synthesis(audio_cache, monkeypatch):
+    calls = []
+    def slow_stub(text, lang):
+        calls.append(text)
+        time.sleep(0.1)
+        return b"mp3"
+    monkeypatch.setattr(tts, "stub_synthesize", slow_stub)
+
+    async def scenario():
+        first = asyncio.create_task(tts.get_audio("Shared.", "en"))
+        await asyncio.sleep(0.02)
+        second = asyncio.create_task(tts.get_audio("Shared.", "en"))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        return await second
+
+    data, key = asyncio.run(scenario())
+    assert data == b"mp3" and calls == ["Shared."]
+    assert audio_cache.get(key) == b"mp3"
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from services.user_rollups import apply_events, load_user_stats, rebuild_user_stats
+
+START = datetime(2024, 5, 1)
+
+def event(action, article_id, minute, **extra):
+    return {"user_id": "u1", "article_id": str(article_id), "action": action,
+            "created_at": START + timedelta(minutes=minute), **extra}
+
+async def add_articles(mongo):
+    first = {"_id": ObjectId(), "simplified_headline": "Budget approved", "readability_score": 4.0,
+             "translations": {"hi": {"headline": "बजट मंज़ूर"}}}
+    second = {"_id": ObjectId(), "simplified_headline": "Rain expected", "readability_score": 6.0}
+    await mongo.articles.insert_many([first, second])
+    return first["_id"], second["_id"]
+
+def history_events(first, second):
+    return [
+        event("view", first, 0), event("view", first, 1), event("view", second, 2),
+        event("quiz", first, 3, quiz_score_pct=80), event("quiz", second, 4, quiz_score_pct=40),
+        {"user_id": "u1", "action": "login"},
+    ]
+
+async def flush(mongo, events):
+    # What the metrics buffer does: insert the batch (which sets each _id), then run the sink on it
+    await mongo.metrics.insert_many(events)
+    await apply_events(events)
+
+def test_rollups_count_distinct_reads_and_keep_recent_history(mongo):
+    async def scenario():
+        first, second = await add_articles(mongo)
+        events = history_events(first, second)
+        # The first read seeds the rollup from earlier metrics, later batches update it
+        await flush(mongo, events[:2])
+        await load_user_stats("u1")
+        await flush(mongo, events[2:])
+        return first, second, await load_user_stats("u1", "hi")
+
+    first, second, stats = asyncio.run(scenario())
+    assert stats["articles_read"] == 2
+    assert stats["avg_readability"] == 5.0 and stats["avg_score"] == 60.0
+    assert [(h["article_id"], h["headline"]) for h in stats["reading_history"]] == [
+        (str(second), "Rain expected"), (str(first), "बजट मंज़ूर"),
+    ]
+    assert [q["score"] for q in stats["quiz_history"]] == [40, 80]
+
+def test_unknown_user_gets_empty_stats(mongo):
+    stats = asyncio.run(load_user_stats("nobody"))
+    assert stats == {"articles_read": 0, "avg_score": 0, "avg_readability": 0, "reading_history": [], "quiz_history": []}
+
+def test_sink_skips_users_until_their_rollup_is_seeded(mongo):
+    async def scenario():
+        first, second = await add_articles(mongo)
+        await flush(mongo, history_events(first, second))
+        unseeded = await mongo.user_stats.find_one({"_id": "u1"})
+        return unseeded, await load_user_stats("u1")
+
+    unseeded, stats = asyncio.run(scenario())
+    assert unseeded is None
+    assert stats["articles_read"] == 2 and stats["avg_score"] == 60.0
+
+def test_rebuild_drops_rollups_and_the_next_read_reseeds_them(mongo):
+    async def scenario():
+        first, second = await add_articles(mongo)
+        events = history_events(first, second)
+        await flush(mongo, events[:3])
+        await load_user_stats("u1")
+        await flush(mongo, events[3:])
+        incremental = await load_user_stats("u1")
+        dropped = await rebuild_user_stats()
+        return incremental, dropped, await load_user_stats("u1")
+
+    incremental, dropped, reseeded = asyncio.run(scenario())
+    assert dropped == 1
+    assert reseeded == incremental
+
+def test_a_rollup_seeded_before_the_sink_runs_counts_each_event_once(mongo):
+    async def scenario():
+        first, second = await add_articles(mongo)
+        events = history_events(first, second)
+        await flush(mongo, events[:2])
+        await load_user_stats("u1")
+        # The next batch is inserted, then a rebuild reseeds the rollup before the sink gets it
+        await mongo.metrics.insert_many(events[2:4])
+        await rebuild_user_stats()
+        await load_user_stats("u1")
+        await apply_events(events[2:4])
+        await flush(mongo, events[4:])
+        return await load_user_stats("u1")
+
+    stats = asyncio.run(scenario())
+    assert stats["articles_read"] == 2 and stats["avg_readability"] == 5.0
+    assert stats["avg_score"] == 60.0 and [q["score"] for q in stats["quiz_history"]] == [40, 80]